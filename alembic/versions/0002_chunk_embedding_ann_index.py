@@ -0,0 +1,63 @@
+"""ANN index on document_chunks.embedding
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+Build parameters come from the same environment variables models.py reads:
+VECTOR_INDEX_TYPE (hnsw or ivfflat), HNSW_M, HNSW_EF_CONSTRUCTION and
+IVFFLAT_LISTS. IVFFlat picks its list centroids from the rows present when
+the index is built, so only choose it once the table holds representative data.
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_document_chunks_embedding_ann'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+    if index_type == "hnsw":
+        index_params = {
+            "m": int(os.getenv("HNSW_M", "16")),
+            "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+        }
+    elif index_type == "ivfflat":
+        index_params = {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+    else:
+        raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {index_type}")
+
+    # Build without locking out writes; CONCURRENTLY cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            'document_chunks',
+            ['embedding'],
+            postgresql_using=index_type,
+            postgresql_with=index_params,
+            postgresql_ops={'embedding': 'vector_l2_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,80 @@
+"""normalize embeddings and switch the ANN index to inner product
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:30:00.000000
+
+Embeddings are now stored with unit length, so inner product ranks exactly
+like cosine similarity and is the cheapest distance for pgvector to compute.
+Existing vectors are normalized in place (l2_normalize needs pgvector 0.7+).
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_document_chunks_embedding_ann'
+# The replacement is built under this name while the old index still serves queries
+TEMP_INDEX_NAME = 'idx_document_chunks_embedding_ann_new'
+
+
+def _index_params():
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+    if index_type == "hnsw":
+        return index_type, {
+            "m": int(os.getenv("HNSW_M", "16")),
+            "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+        }
+    if index_type == "ivfflat":
+        return index_type, {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+    raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {index_type}")
+
+
+def _rebuild_index(opclass: str) -> None:
+    """Swap in an index with another operator class without a window with no index"""
+    index_type, index_params = _index_params()
+    with op.get_context().autocommit_block():
+        # Left behind (invalid) if an earlier concurrent build failed
+        op.drop_index(
+            TEMP_INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            TEMP_INDEX_NAME,
+            'document_chunks',
+            ['embedding'],
+            postgresql_using=index_type,
+            postgresql_with=index_params,
+            postgresql_ops={'embedding': opclass},
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.execute(f"ALTER INDEX {TEMP_INDEX_NAME} RENAME TO {INDEX_NAME}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE document_chunks SET embedding = l2_normalize(embedding) WHERE embedding IS NOT NULL")
+    op.execute("UPDATE documents SET embedding = l2_normalize(embedding) WHERE embedding IS NOT NULL")
+    _rebuild_index('vector_ip_ops')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Normalized vectors stay valid for L2 search, so only the index changes
+    _rebuild_index('vector_l2_ops')
@@ -0,0 +1,87 @@
+"""denormalize is_active onto document_chunks and make the ANN index partial
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:30:00.000000
+
+Deactivated documents drop out of the ANN index entirely, so the retriever's
+is_active filter never post-filters index results and never costs recall.
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_document_chunks_embedding_ann'
+# The replacement is built under this name while the old index still serves queries
+TEMP_INDEX_NAME = 'idx_document_chunks_embedding_ann_new'
+
+
+def _index_params():
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+    if index_type == "hnsw":
+        return index_type, {
+            "m": int(os.getenv("HNSW_M", "16")),
+            "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "64")),
+        }
+    if index_type == "ivfflat":
+        return index_type, {"lists": int(os.getenv("IVFFLAT_LISTS", "100"))}
+    raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {index_type}")
+
+
+def _rebuild_index(where) -> None:
+    """Swap in an index with another predicate without a window with no index"""
+    index_type, index_params = _index_params()
+    with op.get_context().autocommit_block():
+        # Left behind (invalid) if an earlier concurrent build failed
+        op.drop_index(
+            TEMP_INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            TEMP_INDEX_NAME,
+            'document_chunks',
+            ['embedding'],
+            postgresql_using=index_type,
+            postgresql_with=index_params,
+            postgresql_ops={'embedding': 'vector_ip_ops'},
+            postgresql_where=where,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.execute(f"ALTER INDEX {TEMP_INDEX_NAME} RENAME TO {INDEX_NAME}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'document_chunks',
+        sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False),
+    )
+    op.execute(
+        "UPDATE document_chunks c SET is_active = false "
+        "FROM documents d WHERE d.id = c.document_id AND d.is_active IS NOT TRUE"
+    )
+    _rebuild_index(sa.text('is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild_index(None)
+    op.drop_column('document_chunks', 'is_active')
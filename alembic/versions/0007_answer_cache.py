@@ -0,0 +1,47 @@
+"""semantic answer cache table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'answer_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('question_embedding', Vector(384), nullable=False),
+        sa.Column('retrieval_params', sa.String(length=255), nullable=False),
+        sa.Column('active_set_hash', sa.String(length=32), nullable=False),
+        sa.Column('document_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('context', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('idx_answer_cache_active_set_hash', 'answer_cache', ['active_set_hash'], unique=False)
+    op.create_index('idx_answer_cache_document_ids', 'answer_cache', ['document_ids'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_answer_cache_document_ids', table_name='answer_cache')
+    op.drop_index('idx_answer_cache_active_set_hash', table_name='answer_cache')
+    op.drop_table('answer_cache')
@@ -0,0 +1,58 @@
+"""generated tsvector column and GIN index for lexical retrieval
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 16:30:00.000000
+
+Adding a stored generated column rewrites document_chunks once; the GIN
+index is then built concurrently and, like the ANN index, only covers
+chunks of active documents.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_document_chunks_text_search'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'document_chunks',
+        sa.Column(
+            'text_search',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', text)", persisted=True),
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            'document_chunks',
+            ['text_search'],
+            postgresql_using='gin',
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('document_chunks', 'text_search')
@@ -0,0 +1,77 @@
+"""ANN index on quantized chunk embeddings (VECTOR_STORAGE_MODE)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 18:30:00.000000
+
+With VECTOR_STORAGE_MODE=halfvec or binary, replaces the float32 ANN index
+with an expression index on embedding::halfvec(384) (halfvec_ip_ops) or
+binary_quantize(embedding)::bit(384) (bit_hamming_ops), which takes half
+or about 1/32 of the memory. The float32 column stays for re-scoring.
+With VECTOR_STORAGE_MODE=full (the default) this revision changes nothing.
+
+The mode is read when the migration runs; to switch later, run
+`alembic downgrade 0008` and `alembic upgrade head` with the new setting.
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FULL_INDEX_NAME = 'idx_document_chunks_embedding_ann'
+QUANTIZED_INDEX_NAME = 'idx_document_chunks_embedding_quantized'
+
+QUANTIZED_EXPRESSIONS = {
+    "halfvec": ("CAST(embedding AS halfvec(384))", "halfvec_ip_ops"),
+    "binary": ("CAST(binary_quantize(embedding) AS bit(384))", "bit_hamming_ops"),
+}
+
+
+def _index_params():
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+    if index_type == "hnsw":
+        return index_type, (
+            f"m = {int(os.getenv('HNSW_M', '16'))}, "
+            f"ef_construction = {int(os.getenv('HNSW_EF_CONSTRUCTION', '64'))}"
+        )
+    if index_type == "ivfflat":
+        return index_type, f"lists = {int(os.getenv('IVFFLAT_LISTS', '100'))}"
+    raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {index_type}")
+
+
+def _create_index(name: str, expression: str, ops: str) -> None:
+    index_type, index_params = _index_params()
+    op.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON document_chunks "
+        f"USING {index_type} (({expression}) {ops}) WITH ({index_params}) WHERE is_active"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    mode = os.getenv("VECTOR_STORAGE_MODE", "full")
+    if mode == "full":
+        return
+    if mode not in QUANTIZED_EXPRESSIONS:
+        raise ValueError(f"Unknown VECTOR_STORAGE_MODE: {mode}")
+
+    expression, ops = QUANTIZED_EXPRESSIONS[mode]
+    with op.get_context().autocommit_block():
+        # Build the new index before dropping the old one so search never loses its index
+        _create_index(QUANTIZED_INDEX_NAME, expression, ops)
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {FULL_INDEX_NAME}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        _create_index(FULL_INDEX_NAME, "embedding", "vector_ip_ops")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {QUANTIZED_INDEX_NAME}")
@@ -0,0 +1,32 @@
+"""content hash on document chunks for incremental re-indexing
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 20:00:00.000000
+
+A nullable column without a default, so adding it does not rewrite
+document_chunks. Existing rows are not backfilled: re-indexing computes
+the hash of chunks that have none from their text in SQL.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('document_chunks', 'content_hash')
@@ -0,0 +1,45 @@
+"""index answer_cache.expires_at for bounded TTL eviction
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 10:00:00.000000
+
+Eviction deletes expired entries in small batches ordered by expires_at,
+which this index serves without scanning the table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_answer_cache_expires_at'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            'answer_cache',
+            ['expires_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='answer_cache',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,51 @@
+"""embedding_cache.last_used_at for bounded LRU eviction
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 09:00:00.000000
+
+The default is now(), which is not volatile, so adding the column does not
+rewrite the table; existing rows count as used at upgrade time.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'idx_embedding_cache_last_used_at'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'embedding_cache',
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            'embedding_cache',
+            ['last_used_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='embedding_cache',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('embedding_cache', 'last_used_at')
@@ -0,0 +1,51 @@
+"""version counter for the answer cache instead of an active-set hash
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 11:00:00.000000
+
+Cached answers were keyed on an md5 over the ids of all active documents,
+computed on every lookup. They are now keyed on a counter that document
+changes bump in their own transaction. Existing entries cannot be mapped to
+a version and are dropped; the cache refills on demand.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'document_set_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO document_set_version (id, version) VALUES (1, 0)")
+
+    op.execute("DELETE FROM answer_cache")
+    op.drop_index('idx_answer_cache_active_set_hash', table_name='answer_cache')
+    op.drop_column('answer_cache', 'active_set_hash')
+    op.add_column('answer_cache', sa.Column('document_set_version', sa.BigInteger(), nullable=False))
+    op.create_index('idx_answer_cache_document_set_version', 'answer_cache', ['document_set_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM answer_cache")
+    op.drop_index('idx_answer_cache_document_set_version', table_name='answer_cache')
+    op.drop_column('answer_cache', 'document_set_version')
+    op.add_column('answer_cache', sa.Column('active_set_hash', sa.String(length=32), nullable=False))
+    op.create_index('idx_answer_cache_active_set_hash', 'answer_cache', ['active_set_hash'], unique=False)
+
+    op.drop_table('document_set_version')
@@ -0,0 +1,34 @@
+"""lease columns for ingestion jobs
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 14:00:00.000000
+
+A running job belongs to the worker whose token is in lease_owner for as long
+as that worker keeps heartbeat_at fresh. Jobs whose heartbeat stopped are
+re-queued, whatever their age.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('lease_owner', sa.String(length=36), nullable=True))
+    op.add_column('ingestion_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_jobs', 'heartbeat_at')
+    op.drop_column('ingestion_jobs', 'lease_owner')
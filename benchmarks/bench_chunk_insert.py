@@ -0,0 +1,72 @@
+"""
+Chunk insert throughput: ORM add_all + per-row refresh vs. bulk COPY
+
+Runs against the database configured for the application and rolls every
+insert back, so it can be pointed at a populated development database.
+
+    python -m benchmarks.bench_chunk_insert --rows 2000 --repeat 3
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from database import AsyncSessionLocal
+from models import Document, DocumentChunk
+from services.chunk_writer import ChunkRow, bulk_insert_chunks
+
+DIMENSIONS = 384
+
+
+def synthetic_rows(document_id: int, count: int) -> list[ChunkRow]:
+    return [
+        ChunkRow(
+            document_id=document_id,
+            text=f"synthetic chunk {i} " * 25,
+            embedding=[random.random() for _ in range(DIMENSIONS)],
+            meta_data={"source_file": "benchmark", "chunk_index": i},
+        )
+        for i in range(count)
+    ]
+
+
+async def orm_insert(db, rows: list[ChunkRow]) -> None:
+    """The previous upload path: add_all, flush, then one refresh per chunk"""
+    chunks = [DocumentChunk(**row._asdict()) for row in rows]
+    db.add_all(chunks)
+    await db.flush()
+    for chunk in chunks:
+        await db.refresh(chunk)
+
+
+async def bulk_insert(db, rows: list[ChunkRow]) -> None:
+    await bulk_insert_chunks(db, rows)
+
+
+async def measure(insert, rows_count: int) -> float:
+    async with AsyncSessionLocal() as db:
+        document = Document(title="benchmark", is_active=True)
+        db.add(document)
+        await db.flush()
+        rows = synthetic_rows(document.id, rows_count)
+
+        started = time.perf_counter()
+        await insert(db, rows)
+        elapsed = time.perf_counter() - started
+
+        await db.rollback()
+    return rows_count / elapsed
+
+
+async def main(rows: int, repeat: int) -> None:
+    for name, insert in (("orm", orm_insert), ("bulk", bulk_insert)):
+        rates = [await measure(insert, rows) for _ in range(repeat)]
+        print(f"{name:>5}: {max(rates):10.0f} rows/s (best of {repeat}, {rows} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,103 @@
+"""
+Document list payload size and latency: full rows with OFFSET vs projection with keyset
+
+Seeds synthetic documents inside a transaction that is rolled back, then
+times the first and the last page of both list paths, including JSON
+encoding, and reports the response size.
+
+    python -m benchmarks.bench_list_documents --documents 100000 --page-size 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+
+from database import AsyncSessionLocal
+from models import Document
+from routers.documents import DEFAULT_LIST_FIELDS, list_document_page
+
+DIMENSIONS = 384
+SEED_BATCH_SIZE = 5000
+
+
+async def seed(db, count: int, content_chars: int) -> None:
+    for first in range(0, count, SEED_BATCH_SIZE):
+        rows = [
+            {
+                "title": f"synthetic document {i}",
+                "content": "lorem ipsum " * (content_chars // 12),
+                "file_path": f"uploads/synthetic-{i}.txt",
+                "embedding": [random.uniform(-0.1, 0.1) for _ in range(DIMENSIONS)],
+                "is_active": True,
+            }
+            for i in range(first, min(first + SEED_BATCH_SIZE, count))
+        ]
+        await db.execute(insert(Document), rows)
+
+
+async def offset_page(db, skip: int, limit: int) -> bytes:
+    """The previous endpoint: whole ORM rows, OFFSET, stdlib JSON"""
+    documents = (await db.execute(select(Document).offset(skip).limit(limit))).scalars().all()
+    payload = [
+        {
+            "id": document.id,
+            "title": document.title,
+            "content": document.content,
+            "embedding": [float(x) for x in document.embedding] if document.embedding is not None else None,
+            "created_at": document.created_at,
+            "is_active": document.is_active,
+        }
+        for document in documents
+    ]
+    return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+
+
+async def keyset_page(db, after_id, limit: int) -> bytes:
+    response = await list_document_page(db, DEFAULT_LIST_FIELDS, after_id, limit, active_only=False)
+    return response.body
+
+
+async def timed(coro_fn, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await coro_fn()
+        best = min(best, time.perf_counter() - started)
+        size = len(body)
+    return best * 1000, size
+
+
+async def main(documents: int, page_size: int, content_chars: int, repeat: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await seed(db, documents, content_chars)
+        total = (await db.execute(select(Document.id).order_by(Document.id))).scalars().all()
+        last_skip = max(0, len(total) - page_size)
+        last_after_id = total[last_skip - 1] if last_skip else None
+
+        cases = (
+            ("offset, first page", lambda: offset_page(db, 0, page_size)),
+            ("offset, last page", lambda: offset_page(db, last_skip, page_size)),
+            ("keyset, first page", lambda: keyset_page(db, None, page_size)),
+            ("keyset, last page", lambda: keyset_page(db, last_after_id, page_size)),
+        )
+        print(f"{len(total)} documents, {page_size} per page, {content_chars} content chars each")
+        for name, run in cases:
+            latency, size = await timed(run, repeat)
+            print(f"{name:>20}: {latency:8.1f} ms  {size / 1024:10.1f} KiB")
+
+        await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--content-chars", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.documents, args.page_size, args.content_chars, args.repeat))
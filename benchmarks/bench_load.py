@@ -0,0 +1,206 @@
+"""
+Load test the running app and write per-endpoint latency percentiles as JSON
+
+Drives the endpoints over HTTP with a fixed number of concurrent clients
+and records every request's latency. Run the app against the fake LLM and a
+seeded corpus (see the README's Benchmarks section) so only this code is
+measured. Results go to a JSON file with sorted keys; compare two runs with
+benchmarks.compare_results.
+
+    python -m benchmarks.bench_load --base-url http://localhost:8000 \\
+        --scenarios query,query_batch,answer,upload --concurrency 16 --duration 30 \\
+        --output benchmarks/results/run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.seed_corpus import VOCABULARY, synthetic_text
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: list = field(default_factory=list)
+    errors: int = 0
+    status_codes: dict = field(default_factory=dict)
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def question(rng: random.Random) -> str:
+    return "What does the " + " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(3, 8))) + " say?"
+
+
+def make_requests(rng: random.Random, top_k: int, batch_size: int, upload_words: int) -> dict:
+    """Scenario name -> function building the keyword arguments of one request"""
+    return {
+        "query": lambda: dict(method="POST", url="/qa/query", json={"question": question(rng), "top_k": top_k}),
+        "query_hybrid": lambda: dict(
+            method="POST", url="/qa/query",
+            json={"question": question(rng), "top_k": top_k, "search_mode": "hybrid"}
+        ),
+        "query_batch": lambda: dict(
+            method="POST", url="/qa/query/batch",
+            json={"questions": [question(rng) for _ in range(batch_size)], "top_k": top_k}
+        ),
+        "answer": lambda: dict(method="POST", url="/qa/answer", json={"question": question(rng), "top_k": top_k}),
+        "upload": lambda: dict(
+            method="POST", url="/documents/upload",
+            files={"file": (f"bench-{rng.getrandbits(32)}.txt", synthetic_text(rng, upload_words), "text/plain")}
+        ),
+        "list_documents": lambda: dict(method="GET", url="/documents/", params={"limit": 100}),
+    }
+
+
+async def client_loop(client: httpx.AsyncClient, build, stats: EndpointStats, deadline: float, remaining: list) -> None:
+    while time.perf_counter() < deadline:
+        if remaining[0] is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+        request = build()
+        started = time.perf_counter()
+        try:
+            response = await client.request(**request)
+            elapsed = (time.perf_counter() - started) * 1000
+            stats.status_codes[response.status_code] = stats.status_codes.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                stats.errors += 1
+            else:
+                stats.latencies_ms.append(elapsed)
+        except httpx.HTTPError:
+            stats.errors += 1
+
+
+async def run_scenario(base_url: str, build, concurrency: int, duration: float, requests: int, warmup: int, timeout: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        # Warm-up requests are not recorded
+        for _ in range(warmup):
+            try:
+                await client.request(**build())
+            except httpx.HTTPError:
+                pass
+
+        stats = EndpointStats()
+        remaining = [requests or None]
+        started = time.perf_counter()
+        deadline = started + duration if not requests else float("inf")
+        await asyncio.gather(*(
+            client_loop(client, build, stats, deadline, remaining) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(stats.latencies_ms)
+    return {
+        "requests": len(latencies) + stats.errors,
+        "errors": stats.errors,
+        "status_codes": {str(code): count for code, count in sorted(stats.status_codes.items())},
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main(args) -> None:
+    rng = random.Random(args.seed)
+    builders = make_requests(rng, args.top_k, args.batch_size, args.upload_words)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in builders]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}. Available: {', '.join(builders)}")
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        server = {}
+        for name, url in (("pool", "/pool-metrics"), ("embedding", "/qa/embedding-stats")):
+            try:
+                server[name] = (await client.get(url)).json()
+            except (httpx.HTTPError, ValueError):
+                pass
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "top_k": args.top_k,
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+            "label": args.label,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "endpoints": {},
+    }
+    for name in scenarios:
+        print(f"{name}: {args.concurrency} clients ...", flush=True)
+        result = await run_scenario(
+            args.base_url, builders[name], args.concurrency, args.duration,
+            args.requests, args.warmup, args.timeout
+        )
+        results["endpoints"][name] = result
+        latency = result["latency_ms"]
+        print(
+            f"{name:>15}: {result['throughput_rps']:8.1f} req/s  p50 {latency['p50']:8.1f}  "
+            f"p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f} ms  errors {result['errors']}"
+        )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenarios", default="query,query_batch,answer,upload")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per scenario instead of --duration")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32, help="Questions per query_batch request")
+    parser.add_argument("--upload-words", type=int, default=5000)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="Free text stored with the results")
+    parser.add_argument(
+        "--output",
+        default=os.path.join("benchmarks", "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,155 @@
+"""
+Vector search per VECTOR_STORAGE_MODE: index size, latency and recall@k
+
+Queries are perturbed copies of stored chunk embeddings. Ground truth is an
+exact sequential scan. Each mode runs the retriever's search statement
+(compact candidate search plus float32 re-scoring) against its index; with
+--build-missing, indexes that do not exist yet are built inside the
+benchmark's transaction and rolled back afterwards.
+
+    python -m benchmarks.bench_quantized_search --queries 200 --top-k 5 --candidates 40 --build-missing
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal
+from models import VECTOR_INDEX_PARAMS, VECTOR_INDEX_TYPE
+from services.retriever import build_batch_search_sql
+
+INDEXES = {
+    "full": ("idx_document_chunks_embedding_ann", "embedding", "vector_ip_ops"),
+    "halfvec": ("idx_document_chunks_embedding_quantized", "CAST(embedding AS halfvec(384))", "halfvec_ip_ops"),
+    "binary": ("idx_document_chunks_embedding_quantized", "CAST(binary_quantize(embedding) AS bit(384))", "bit_hamming_ops"),
+}
+
+EXACT_SQL = text("""
+SELECT id FROM document_chunks
+WHERE is_active
+ORDER BY embedding <#> CAST(:embedding AS vector)
+LIMIT :top_k
+""")
+
+SEARCH_IDS_SQL = """
+SELECT c.id FROM document_chunks c
+WHERE c.is_active
+ORDER BY {order}
+LIMIT :candidates
+"""
+
+
+def vector_text(vector: list[float]) -> str:
+    return "[" + ",".join(str(x) for x in vector) + "]"
+
+
+def perturb(vector: list[float], noise: float) -> list[float]:
+    noisy = [x + random.gauss(0, noise) for x in vector]
+    norm = math.sqrt(sum(x * x for x in noisy)) or 1.0
+    return [x / norm for x in noisy]
+
+
+async def index_exists(db, name: str, expression: str) -> bool:
+    definition = (await db.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}
+    )).scalar()
+    if definition is None:
+        return False
+    # The quantized index name is shared by halfvec and binary
+    return ("binary_quantize" in definition) == ("binary_quantize" in expression) and \
+        ("halfvec" in definition) == ("halfvec" in expression)
+
+
+async def build_index(db, mode: str) -> None:
+    name, expression, ops = INDEXES[mode]
+    params = ", ".join(f"{key} = {value}" for key, value in VECTOR_INDEX_PARAMS.items())
+    await db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    await db.execute(text(
+        f"CREATE INDEX {name} ON document_chunks USING {VECTOR_INDEX_TYPE} "
+        f"(({expression}) {ops}) WITH ({params}) WHERE is_active"
+    ))
+
+
+async def search_latencies(db, mode: str, queries: list[list[float]], top_k: int, candidates: int) -> list[float]:
+    """Latency of the retriever's full statement: candidate search, re-scoring and document join"""
+    statement = build_batch_search_sql(mode)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await db.execute(statement, {
+            "embeddings": [vector_text(query)],
+            "min_similarity_score": None,
+            "candidates": candidates,
+            "top_k": top_k,
+        })
+        latencies.append((time.perf_counter() - started) * 1000)
+    return sorted(latencies)
+
+
+async def main(num_queries: int, top_k: int, candidates: int, noise: float, build_missing: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        samples = (await db.execute(text(
+            "SELECT embedding::text FROM document_chunks WHERE is_active ORDER BY random() LIMIT :n"
+        ), {"n": num_queries})).scalars().all()
+        queries = [perturb([float(x) for x in sample.strip("[]").split(",")], noise) for sample in samples]
+        rows = (await db.execute(text(
+            "SELECT count(*), pg_size_pretty(pg_table_size('document_chunks')) FROM document_chunks WHERE is_active"
+        ))).one()
+        print(f"{rows[0]} active chunks, table {rows[1]}, {len(queries)} queries, top_k={top_k}, candidates={candidates}")
+
+        # Ground truth by exact scan
+        await db.execute(text("SET LOCAL enable_indexscan = off"))
+        truth = [
+            set((await db.execute(EXACT_SQL, {"embedding": vector_text(query), "top_k": top_k})).scalars().all())
+            for query in queries
+        ]
+        await db.execute(text("SET LOCAL enable_indexscan = on"))
+
+        for mode, (name, expression, _) in INDEXES.items():
+            if not await index_exists(db, name, expression):
+                if not build_missing:
+                    print(f"{mode:>8}: no index, skipped (use --build-missing)")
+                    continue
+                await build_index(db, mode)
+            size = (await db.execute(text("SELECT pg_size_pretty(pg_relation_size(CAST(CAST(:name AS text) AS regclass)))"), {"name": name})).scalar()
+
+            order = expression.replace("embedding", "c.embedding")
+            query_order = expression.replace("embedding", "CAST(:embedding AS vector)")
+            operator = "<~>" if mode == "binary" else "<#>"
+            ids_sql = text(SEARCH_IDS_SQL.format(order=f"{order} {operator} {query_order}"))
+
+            mode_candidates = candidates if mode != "full" else top_k
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, mode_candidates)}"))
+            recalls = []
+            for query, expected in zip(queries, truth):
+                found = (await db.execute(ids_sql, {
+                    "embedding": vector_text(query),
+                    "candidates": mode_candidates,
+                })).scalars().all()
+                # Candidates are re-scored exactly, so every true neighbour
+                # among them ends up in the top k
+                recalls.append(len(expected & set(found)) / len(expected) if expected else 1.0)
+
+            latencies = await search_latencies(db, mode, queries, top_k, mode_candidates)
+            print(
+                f"{mode:>8}: index {size:>10}  recall@{top_k} {statistics.mean(recalls):.3f}  "
+                f"p50 {latencies[len(latencies) // 2]:6.2f} ms  "
+                f"p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms"
+            )
+
+        await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=40)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--build-missing", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.top_k, args.candidates, args.noise, args.build_missing))
@@ -0,0 +1,71 @@
+"""
+Cross-encoder re-ranking throughput on CPU, in (query, chunk) pairs per second
+
+Needs no database. Compares batch sizes and torch thread counts so
+RERANK_BATCH_SIZE and RERANK_CANDIDATES can be sized against RERANK_TIMEOUT_MS
+on the target machine.
+
+    python -m benchmarks.bench_reranker --candidates 20 --batch-sizes 8,16,32 --threads 1,2,4
+"""
+import argparse
+import os
+import random
+import time
+
+from services.reranker import RERANKER_MODEL_NAME, Reranker
+
+WORDS = (
+    "index vector query latency document chunk model token cache server "
+    "database request response error timeout budget score rank embedding"
+).split()
+
+
+def synthetic_chunk(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+def measure(reranker: Reranker, query: str, chunks: list[str], repeat: int) -> tuple[float, float]:
+    """Best pairs/s and the matching latency of one request, in ms"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        reranker.score(query, chunks)
+        best = min(best, time.perf_counter() - started)
+    return len(chunks) / best, best * 1000
+
+
+def main(model_name: str, candidates: int, chunk_words: int, batch_sizes: list[int], threads: list[int], repeat: int) -> None:
+    import torch
+
+    query = "why does the vector query exceed its latency budget"
+    chunks = [synthetic_chunk(chunk_words) for _ in range(candidates)]
+    print(f"{model_name}, {candidates} candidates of {chunk_words} words, {os.cpu_count()} CPUs")
+
+    reranker = Reranker(model_name=model_name)
+    reranker.score(query, chunks[:1])  # Load the model outside the timing
+
+    for num_threads in threads:
+        torch.set_num_threads(num_threads)
+        for batch_size in batch_sizes:
+            reranker.batch_size = batch_size
+            rate, latency = measure(reranker, query, chunks, repeat)
+            print(f"threads={num_threads:<3} batch={batch_size:<4} {rate:10.1f} pairs/s  {latency:8.1f} ms/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=RERANKER_MODEL_NAME)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--chunk-words", type=int, default=250)
+    parser.add_argument("--batch-sizes", default="8,16,32")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(
+        args.model,
+        args.candidates,
+        args.chunk_words,
+        [int(size) for size in args.batch_sizes.split(",")],
+        [int(count) for count in args.threads.split(",")],
+        args.repeat,
+    )
@@ -0,0 +1,64 @@
+"""
+Cold start: import time of the app, and time until the server is live and ready
+
+Starts `uvicorn main:app` in a subprocess and polls /health/live and
+/health/ready, so the numbers include interpreter start-up.
+
+    python -m benchmarks.bench_startup --port 8123 --repeat 3
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def import_seconds() -> float:
+    """Wall time of a fresh interpreter importing the app"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], check=True)
+    return time.perf_counter() - started
+
+
+def wait_for(client: httpx.Client, url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {timeout} s")
+
+
+def server_seconds(port: int, timeout: float) -> tuple[float, float]:
+    """Seconds from launch until /health/live and /health/ready answer 200"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            live = wait_for(client, "/health/live", started, timeout)
+            ready = wait_for(client, "/health/ready", started, timeout)
+        return live, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(port: int, repeat: int, timeout: float) -> None:
+    for run in range(1, repeat + 1):
+        imported = import_seconds()
+        live, ready = server_seconds(port, timeout)
+        print(f"run {run}: import {imported:6.2f} s  live {live:6.2f} s  ready {ready:6.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+    main(args.port, args.repeat, args.timeout)
@@ -0,0 +1,49 @@
+"""
+Compare two bench_load result files endpoint by endpoint
+
+    python -m benchmarks.compare_results benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import json
+
+METRICS = (
+    ("throughput_rps", lambda result: result["throughput_rps"], True),
+    ("p50_ms", lambda result: result["latency_ms"]["p50"], False),
+    ("p95_ms", lambda result: result["latency_ms"]["p95"], False),
+    ("p99_ms", lambda result: result["latency_ms"]["p99"], False),
+    ("errors", lambda result: result["errors"], False),
+)
+
+
+def change(before: float, after: float) -> str:
+    if before == 0:
+        return "n/a" if after == 0 else "new"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"before: {before['meta'].get('git_commit')} {before['meta'].get('label', '')}")
+    print(f"after:  {after['meta'].get('git_commit')} {after['meta'].get('label', '')}")
+    for name in sorted(set(before["endpoints"]) | set(after["endpoints"])):
+        if name not in before["endpoints"] or name not in after["endpoints"]:
+            print(f"\n{name}: only in {'after' if name in after['endpoints'] else 'before'}")
+            continue
+        print(f"\n{name}")
+        for metric, value, higher_is_better in METRICS:
+            old, new = value(before["endpoints"][name]), value(after["endpoints"][name])
+            better = (new > old) == higher_is_better if new != old else None
+            verdict = "" if better is None else ("better" if better else "worse")
+            print(f"  {metric:>15}: {old:10.2f} -> {new:10.2f}  {change(old, new):>8}  {verdict}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+    main(args.before, args.after)
@@ -0,0 +1,77 @@
+"""
+Local stand-in for the Groq chat completions API
+
+Serves /openai/v1/chat/completions with canned tokens, streamed or not, after
+a configurable delay, so the answer endpoints can be tested and benchmarked
+without network access or API costs.
+
+    FAKE_LLM_FIRST_TOKEN_MS=300 FAKE_LLM_TOKEN_MS=20 uvicorn benchmarks.fake_llm:app --port 9000
+    LLM_BASE_URL=http://localhost:9000 GROQ_API_KEY=fake uvicorn main:app
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FIRST_TOKEN_MS = float(os.getenv("FAKE_LLM_FIRST_TOKEN_MS", "200"))
+TOKEN_MS = float(os.getenv("FAKE_LLM_TOKEN_MS", "10"))
+CANNED_ANSWER = os.getenv(
+    "FAKE_LLM_ANSWER",
+    "Based on the provided context, this is a canned answer from the fake LLM server."
+)
+
+app = FastAPI()
+
+
+def tokens(max_tokens: int) -> list[str]:
+    words = CANNED_ANSWER.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)][:max_tokens]
+
+
+def completion_chunk(completion_id: str, model: str, content: str = None, finish_reason: str = None) -> dict:
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    answer_tokens = tokens(body.get("max_tokens") or 1024)
+
+    if not body.get("stream"):
+        await asyncio.sleep((FIRST_TOKEN_MS + TOKEN_MS * len(answer_tokens)) / 1000)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(answer_tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(answer_tokens), "total_tokens": len(answer_tokens)},
+        }
+
+    async def events():
+        await asyncio.sleep(FIRST_TOKEN_MS / 1000)
+        for i, token in enumerate(answer_tokens):
+            if i:
+                await asyncio.sleep(TOKEN_MS / 1000)
+            yield f"data: {json.dumps(completion_chunk(completion_id, model, token))}\n\n"
+        yield f"data: {json.dumps(completion_chunk(completion_id, model, finish_reason='stop'))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
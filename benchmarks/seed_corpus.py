@@ -0,0 +1,124 @@
+"""
+Seed the database with a synthetic corpus for benchmarks
+
+Documents are titled "bench:<n>" so they can be told apart from real data
+and removed with --reset. Text is drawn from a fixed vocabulary, and
+embeddings are random unit vectors around a few hundred topic centroids,
+so ANN indexes see clustered data rather than uniform noise. The same
+--seed always produces the same corpus. No model is needed.
+
+    python -m benchmarks.seed_corpus --chunks 100000 --chunks-per-document 50 --reset
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from sqlalchemy import delete, func, insert, select
+
+from database import AsyncSessionLocal
+from models import Document, DocumentChunk
+from services.chunk_writer import ChunkRow, bulk_insert_chunks
+
+DIMENSIONS = 384
+TITLE_PREFIX = "bench:"
+TOPICS = 256
+WRITE_BATCH_SIZE = 5000
+
+VOCABULARY = (
+    "index vector query latency document chunk model token cache server database "
+    "request response error timeout budget score rank embedding storage replica "
+    "network packet kernel thread process memory page buffer disk block segment "
+    "invoice customer order payment refund shipment warehouse supplier contract "
+    "policy compliance audit report quarter revenue forecast margin budget plan"
+).split()
+
+
+def normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        words -= length
+    return " ".join(sentences)
+
+
+async def reset(db) -> int:
+    documents = select(Document.id).where(Document.title.startswith(TITLE_PREFIX))
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(documents)))
+    result = await db.execute(delete(Document).where(Document.title.startswith(TITLE_PREFIX)))
+    await db.commit()
+    return result.rowcount
+
+
+async def seed(chunks: int, chunks_per_document: int, chunk_words: int, seed_value: int, reset_first: bool) -> None:
+    rng = random.Random(seed_value)
+    centroids = [normalize([rng.gauss(0, 1) for _ in range(DIMENSIONS)]) for _ in range(TOPICS)]
+
+    async with AsyncSessionLocal() as db:
+        if reset_first:
+            print(f"Removed {await reset(db)} benchmark documents")
+
+        started = time.perf_counter()
+        written = 0
+        document_number = 0
+        while written < chunks:
+            # One transaction per batch of whole documents
+            batch_documents = max(1, WRITE_BATCH_SIZE // chunks_per_document)
+            titles = []
+            for _ in range(batch_documents):
+                if written + len(titles) * chunks_per_document >= chunks:
+                    break
+                titles.append(f"{TITLE_PREFIX}{document_number}")
+                document_number += 1
+
+            document_ids = (await db.execute(
+                insert(Document).returning(Document.id),
+                [
+                    {"title": title, "file_path": None, "content": None, "is_active": True}
+                    for title in titles
+                ]
+            )).scalars().all()
+
+            rows = []
+            for document_id in document_ids:
+                topic = centroids[rng.randrange(TOPICS)]
+                for chunk_index in range(min(chunks_per_document, chunks - written - len(rows))):
+                    rows.append(ChunkRow(
+                        document_id=document_id,
+                        text=synthetic_text(rng, chunk_words),
+                        embedding=normalize([x + rng.gauss(0, 0.05) for x in topic]),
+                        meta_data={"source_file": "benchmark", "chunk_index": chunk_index},
+                    ))
+            await bulk_insert_chunks(db, rows)
+            await db.commit()
+
+            written += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"{written}/{chunks} chunks, {written / elapsed:.0f} chunks/s", end="\r")
+
+        total = (await db.execute(select(func.count()).select_from(DocumentChunk))).scalar()
+        print(f"\nSeeded {written} chunks in {document_number} documents; {total} chunks in the table")
+        # Fresh statistics so the planner sees the new row counts
+        connection = await db.connection()
+        await connection.exec_driver_sql("ANALYZE document_chunks")
+        await connection.exec_driver_sql("ANALYZE documents")
+        await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=1000, help="e.g. 1000, 100000 or 1000000")
+    parser.add_argument("--chunks-per-document", type=int, default=50)
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Remove earlier benchmark documents first")
+    args = parser.parse_args()
+    asyncio.run(seed(args.chunks, args.chunks_per_document, args.chunk_words, args.seed, args.reset))
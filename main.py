@@ -1,12 +1,39 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from database import get_db
 from routers import documents, qa
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import text
-from database import init_db
+from database import init_db, pool_status
+from services.embedding import embedding_service, EmbeddingQueueFull
+from services.ingestion import ingestion_pool
+from services.extraction import extraction_pool
+from services.llm import llm_client
+from services.reranker import reranker, RERANK_ENABLED
+from services.metrics import REQUEST_SECONDS, finish_trace, render_metrics, start_trace
+from prometheus_client import CONTENT_TYPE_LATEST
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import time
 
-app = FastAPI()
+load_dotenv()
+
+# Request payloads are only logged with LOG_PAYLOADS=true, whatever the level
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Schema is managed by alembic; create_all is only for throwaway databases
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "false").lower() == "true"
+# Load models in the background at startup; /health/ready waits for it
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+
+app = FastAPI(default_response_class=ORJSONResponse)
 app.include_router(documents.router)
 app.include_router(qa.router)
 # CORS middleware if needed
@@ -18,14 +45,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    trace = start_trace(request.headers.get("traceparent"))
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if trace is not None:
+            response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        # The route template keeps label cardinality bounded, unlike the raw path
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.labels(request.method, route_path, str(status)).observe(elapsed)
+        if trace is not None:
+            finish_trace(trace, request.method, route_path, status, elapsed)
+
+async def warm_up_models():
+    try:
+        await embedding_service.warm_up()
+        if RERANK_ENABLED:
+            # Keep the model load out of the first request's latency budget
+            await reranker.warm_up()
+        logger.info("Models loaded")
+    except Exception as e:
+        logger.error(f"Model warm-up failed: {e}")
+
 @app.on_event("startup")
 async def on_startup():
-    await init_db()
+    if DB_CREATE_ALL:
+        await init_db()
+    await ingestion_pool.start()
+    if MODEL_WARMUP:
+        # Not awaited: the app accepts health checks while models load
+        app.state.warm_up_task = asyncio.create_task(warm_up_models())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await ingestion_pool.stop()
+    await llm_client.aclose()
+    embedding_service.shutdown()
+    reranker.shutdown()
+    extraction_pool.shutdown()
+
+@app.exception_handler(EmbeddingQueueFull)
+async def embedding_queue_full_handler(request: Request, exc: EmbeddingQueueFull):
+    # Shed load instead of letting requests pile up behind the model
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to RAG Application"}
 
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; touches neither models nor the database"""
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness(db: AsyncSession = Depends(get_db)):
+    """Whether this replica should get traffic: database reachable and models warmed up"""
+    checks = {}
+    try:
+        await db.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+
+    # Without warm-up, models load lazily on the first request that needs them
+    models_ready = embedding_service.ready or not MODEL_WARMUP
+    checks["embedding_model"] = "loaded" if embedding_service.ready else ("loading" if MODEL_WARMUP else "lazy")
+    if RERANK_ENABLED:
+        models_ready = models_ready and (reranker.loaded or not MODEL_WARMUP)
+        checks["reranker"] = "loaded" if reranker.loaded else ("loading" if MODEL_WARMUP else "lazy")
+
+    ready = checks["database"] == "ok" and models_ready
+    return ORJSONResponse(
+        {"ready": ready, "checks": checks},
+        status_code=200 if ready else 503
+    )
+
 # Example endpoint using database
 @app.get("/test-db")
 async def test_db(db: AsyncSession = Depends(get_db)):
@@ -34,4 +141,14 @@ async def test_db(db: AsyncSession = Depends(get_db)):
         result = await db.execute(text("SELECT 1"))  # Wrap SQL in text()
         return {"db_connection": "success", "result": result.scalar()}
     except Exception as e:
-        return {"db_connection": "failed", "error": str(e)}
\ No newline at end of file
+        return {"db_connection": "failed", "error": str(e)}
+
+@app.get("/pool-metrics")
+async def pool_metrics():
+    """Database connection pool occupancy and checkout wait times for this worker"""
+    return pool_status()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus exposition of per-stage and per-route latency histograms"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -73,11 +73,44 @@
 #         return f"<Document {self.title}>"
 
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Index
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Index, Computed, cast
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, true
+from sqlalchemy.sql import text as sql_text  # DocumentChunk.text shadows text()
 from database import Base
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+import os
+
+# ANN index build parameters (see alembic/versions/0002_chunk_embedding_ann_index.py)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw")  # "hnsw" or "ivfflat"
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
+
+if VECTOR_INDEX_TYPE == "ivfflat":
+    VECTOR_INDEX_PARAMS = {"lists": IVFFLAT_LISTS}
+else:
+    VECTOR_INDEX_PARAMS = {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION}
+
+EMBEDDING_DIMENSIONS = 384
+# What the chunk ANN index is built on (see alembic/versions/0009_quantized_vector_index.py):
+# "full" float32 vectors, "halfvec" float16 (half the size) or "binary" one
+# bit per dimension (1/32 of the size). The float32 column is always kept and
+# quantized searches re-score their candidates against it.
+VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "full")
+if VECTOR_STORAGE_MODE not in ("full", "halfvec", "binary"):
+    raise ValueError(f"Unknown VECTOR_STORAGE_MODE: {VECTOR_STORAGE_MODE}")
+QUANTIZED_INDEX_OPS = {"halfvec": "halfvec_ip_ops", "binary": "bit_hamming_ops"}
+
+
+def quantize_embedding(embedding):
+    """The compact form of a vector expression that VECTOR_STORAGE_MODE indexes"""
+    if VECTOR_STORAGE_MODE == "halfvec":
+        return cast(embedding, HALFVEC(EMBEDDING_DIMENSIONS))
+    if VECTOR_STORAGE_MODE == "binary":
+        return cast(func.binary_quantize(embedding), BIT(EMBEDDING_DIMENSIONS))
+    return embedding
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
@@ -85,12 +118,39 @@ class DocumentChunk(Base):
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(384))  # Match your embedding dimension
+    embedding = Column(Vector(EMBEDDING_DIMENSIONS))  # Match your embedding dimension
     meta_data = Column(JSON, nullable=True)  # Optional metadata
+    # Copy of Document.is_active so the ANN index can be partial on it
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true())
+    # Maintained by Postgres for full-text (lexical) retrieval
+    text_search = Column(TSVECTOR, Computed("to_tsvector('english', text)", persisted=True))
+    # sha256 of text; lets a re-indexed document keep unchanged chunks and their embeddings
+    content_hash = Column(String(64), nullable=True)
     
     # Correct Index import and usage
     __table_args__ = (
         Index('idx_document_chunks_document_id', 'document_id'),
+        Index(
+            'idx_document_chunks_embedding_ann',
+            'embedding',
+            postgresql_using=VECTOR_INDEX_TYPE,
+            postgresql_with=VECTOR_INDEX_PARAMS,
+            postgresql_ops={'embedding': 'vector_ip_ops'},
+            postgresql_where=sql_text('is_active'),
+        ) if VECTOR_STORAGE_MODE == "full" else Index(
+            'idx_document_chunks_embedding_quantized',
+            quantize_embedding(embedding).label('embedding_quantized'),
+            postgresql_using=VECTOR_INDEX_TYPE,
+            postgresql_with=VECTOR_INDEX_PARAMS,
+            postgresql_ops={'embedding_quantized': QUANTIZED_INDEX_OPS[VECTOR_STORAGE_MODE]},
+            postgresql_where=sql_text('is_active'),
+        ),
+        Index(
+            'idx_document_chunks_text_search',
+            'text_search',
+            postgresql_using='gin',
+            postgresql_where=sql_text('is_active'),
+        ),
     )
     
     document = relationship("Document", back_populates="chunks")
@@ -113,4 +173,89 @@ class Document(Base):
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
     
     def __repr__(self):
-        return f"<Document {self.title}>"
\ No newline at end of file
+        return f"<Document {self.title}>"
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(String(36), primary_key=True)  # uuid4
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    generate_embeddings = Column(Boolean, nullable=False, default=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+    # Progress counters, updated after every chunk batch
+    pages_extracted = Column(Integer, nullable=False, default=0)
+    chunks_embedded = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Token of the worker holding a running job, and when it last proved alive
+    lease_owner = Column(String(36), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('idx_ingestion_jobs_status', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<IngestionJob {self.id} {self.status}>"
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+    
+    # sha256 of (model name, whitespace-normalized text)
+    key = Column(String(64), primary_key=True)
+    model_name = Column(String(255), nullable=False)
+    embedding = Column(Vector(384), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Refreshed at most hourly on hits; eviction drops the least recently used
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_embedding_cache_last_used_at', 'last_used_at'),
+    )
+    
+    def __repr__(self):
+        return f"<EmbeddingCacheEntry {self.key}>"
+
+
+class AnswerCacheEntry(Base):
+    __tablename__ = "answer_cache"
+    
+    id = Column(Integer, primary_key=True)
+    question = Column(Text, nullable=False)
+    question_embedding = Column(Vector(384), nullable=False)
+    # Retrieval settings the answer was produced with, e.g. "top_k=3;min_score=0.5"
+    retrieval_params = Column(String(255), nullable=False)
+    # DocumentSetVersion.version when the request that produced it started
+    document_set_version = Column(BigInteger, nullable=False)
+    document_ids = Column(ARRAY(Integer), nullable=False)  # Documents the context came from
+    answer = Column(Text, nullable=False)
+    context = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_answer_cache_document_set_version', 'document_set_version'),
+        Index('idx_answer_cache_document_ids', 'document_ids', postgresql_using='gin'),
+        Index('idx_answer_cache_expires_at', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f"<AnswerCacheEntry {self.id}>"
+
+
+class DocumentSetVersion(Base):
+    __tablename__ = "document_set_version"
+    
+    # A single row, bumped in every transaction that changes what retrieval can return
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
+    
+    def __repr__(self):
+        return f"<DocumentSetVersion {self.version}>"
\ No newline at end of file
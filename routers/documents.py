@@ -1,11 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from services.embedding import embedding_service
+from services.answer_cache import AnswerCache
+from services.embedding import EmbeddingQueueFull
+from services.ingestion import MAX_UPLOAD_SIZE, ExtractionError, UploadTooLarge, ingest_document, ingestion_pool, reindex_document, save_upload
 from typing import Optional
-from models import Document, DocumentChunk
+from models import Document, DocumentChunk, IngestionJob
 from database import get_db
-from schemas import DocumentCreate, DocumentResponse, DocumentListResponse, DocumentUpdate
+from schemas import DocumentCreate, DocumentResponse, DocumentListResponse, DocumentReindexResponse, DocumentUpdate, IngestionJobResponse
+from dataclasses import asdict
 import os
 import uuid
 import logging
@@ -17,6 +21,41 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 logger = logging.getLogger(__name__)
 
+async def store_upload(file: UploadFile) -> tuple[str, str]:
+    """Validate an upload and stream it into UPLOAD_DIR, returning (file_path, file_ext)"""
+    # Validate file is not empty
+    if not file.filename:
+        logger.error("No file uploaded")
+        raise HTTPException(status_code=400, detail="No file uploaded")
+
+    # Validate file size (optional)
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)  # Reset file pointer
+
+    if file_size > MAX_UPLOAD_SIZE:
+        logger.error(f"File too large: {file_size} bytes")
+        raise HTTPException(status_code=413, detail="File too large")
+
+    # Save file locally
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}{file_ext}")
+
+    # Ensure uploads directory exists
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # Stream file content to disk
+    try:
+        await save_upload(file, file_path)
+    except UploadTooLarge as size_err:
+        logger.error(str(size_err))
+        raise HTTPException(status_code=413, detail="File too large")
+    except IOError as io_err:
+        logger.error(f"File write error: {io_err}")
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {io_err}")
+
+    return file_path, file_ext
+
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     file: UploadFile = File(...),
@@ -24,200 +63,249 @@ async def upload_document(
     generate_embeddings: Optional[bool] = True
 ):
     try:
-        # Validate file is not empty
-        if not file.filename:
-            logger.error("No file uploaded")
-            raise HTTPException(status_code=400, detail="No file uploaded")
-
-        # Validate file size (optional)
-        file.file.seek(0, os.SEEK_END)
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset file pointer
-
-        if file_size > 10_000_000:  # 10MB limit
-            logger.error(f"File too large: {file_size} bytes")
-            raise HTTPException(status_code=413, detail="File too large")
-
-        # Save file locally
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}{file_ext}")
-
-        # Ensure uploads directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        # Save file content
-        try:
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-        except IOError as io_err:
-            logger.error(f"File write error: {io_err}")
-            raise HTTPException(status_code=500, detail=f"Failed to save file: {io_err}")
-
-        # Extract text (with improved text extraction)
-        content_text = ""
-        try:
-            if file_ext == ".txt":
-                with open(file_path, "r", encoding='utf-8') as f:
-                    content_text = f.read()
-            elif file_ext == ".pdf":
-                # Add PDF text extraction (using PyPDF2 or similar)
-                import PyPDF2
-                with open(file_path, 'rb') as pdf_file:
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    content_text = " ".join(page.extract_text() for page in pdf_reader.pages)
-            elif file_ext in [".docx", ".doc"]:
-                # Add Word document text extraction (using python-docx or similar)
-                import docx
-                doc = docx.Document(file_path)
-                content_text = " ".join(para.text for para in doc.paragraphs)
-        except Exception as read_err:
-            logger.warning(f"Could not read file content: {read_err}")
-            raise HTTPException(status_code=400, detail=f"Unable to extract text from file: {read_err}")
+        file_path, file_ext = await store_upload(file)
 
         # Create document record
         document = Document(
             title=file.filename,
-            content=content_text,
             file_path=file_path,
             is_active=True
         )
 
-        # Generate document-level embedding
-        document_embedding = None
-        if generate_embeddings and content_text:
-            try:
-                document_embedding = await embedding_service.generate_embeddings(content_text)
-                document.embedding = document_embedding
-            except Exception as embed_err:
-                logger.error(f"Document-level embedding generation error: {embed_err}")
-
-        # Chunk the document and generate chunk embeddings
-        chunks = []
-        if generate_embeddings and content_text:
-            try:
-                # Use the chunk_and_embed method from previous implementation
-                chunk_texts, chunk_embeddings = await embedding_service.chunk_and_embed(content_text)
-                
-                # Create DocumentChunk instances
-                for text, embedding in zip(chunk_texts, chunk_embeddings):
-                    chunk = DocumentChunk(
-                        document=document,
-                        text=text,
-                        embedding=embedding,
-                        metadata={
-                            "source_file": file.filename,
-                            "total_document_length": len(content_text)
-                        }
-                    )
-                    chunks.append(chunk)
-            except Exception as chunk_err:
-                logger.error(f"Document chunking error: {chunk_err}")
-
-        # Add document and chunks to the session
-        db.add(document)
-        if chunks:
-            db.add_all(chunks)
+        # Extract, chunk and embed the file as a stream
+        try:
+            result = await ingest_document(
+                db,
+                document,
+                file_path,
+                file_ext,
+                generate_embeddings=bool(generate_embeddings)
+            )
+        except ExtractionError as read_err:
+            await db.rollback()
+            logger.warning(f"Could not read file content: {read_err}")
+            raise HTTPException(status_code=400, detail=f"Unable to extract text from file: {read_err}")
 
         await db.commit()
         await db.refresh(document)
-        
-        # Refresh chunks to ensure they have IDs
-        if chunks:
-            for chunk in chunks:
-                await db.refresh(chunk)
 
         logger.info(f"Successfully uploaded document: {file.filename}")
         
         # Return the document with some metadata about chunking
         return {
             **document.__dict__,
-            "num_chunks": len(chunks),
-            "total_document_length": len(content_text)
+            "num_chunks": result.num_chunks,
+            "total_document_length": result.total_document_length
         }
 
-    except HTTPException:
+    except (HTTPException, EmbeddingQueueFull):
         raise
     except Exception as e:
         logger.error(f"Unexpected error uploading document: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.put("/{doc_id}/content", response_model=DocumentReindexResponse)
+async def update_document_content(
+    doc_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Replace a document's text with a new version of the file
+
+    Chunks whose text is unchanged keep their rows and embeddings; only new
+    or edited chunks are embedded, and chunks that disappeared are deleted,
+    all in one transaction.
+    """
+    file_path, file_ext = await store_upload(file)
+    try:
+        # Serializes concurrent updates of the same document
+        document = (await db.execute(
+            select(Document).where(Document.id == doc_id).with_for_update()
+        )).scalar_one_or_none()
+        if document is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        old_file_path = document.file_path
+
+        try:
+            result = await reindex_document(db, document, file_path, file_ext)
+        except ExtractionError as read_err:
+            logger.warning(f"Could not read file content: {read_err}")
+            raise HTTPException(status_code=400, detail=f"Unable to extract text from file: {read_err}")
+
+        # Cached answers may quote the old text
+        await AnswerCache.invalidate_documents(db, [doc_id])
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        os.remove(file_path)
+        raise
+
+    await db.refresh(document)
+    if old_file_path and old_file_path != file_path and os.path.exists(old_file_path):
+        os.remove(old_file_path)
+
+    logger.info(
+        f"Re-indexed document {doc_id}: {result.chunks_reused} chunks reused, "
+        f"{result.chunks_embedded} embedded, {result.chunks_removed} removed"
+    )
+    return {**document.__dict__, **asdict(result)}
+
+@router.post("/upload/async", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_document_async(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    generate_embeddings: Optional[bool] = True
+):
+    """Store the upload and ingest it in the background; poll /documents/jobs/{job_id}"""
+    file_path, _ = await store_upload(file)
+
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        status="queued",
+        filename=file.filename,
+        file_path=file_path,
+        generate_embeddings=bool(generate_embeddings),
+        pages_extracted=0,
+        chunks_embedded=0,
+        rows_written=0
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    ingestion_pool.submit(job.id)
+    return job
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    job = await db.get(IngestionJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingestion job not found"
+        )
+    return job
+
+# Columns a list request may select with ?fields=; embedding and content are opt-in
+LIST_FIELDS = {
+    "id": Document.id,
+    "title": Document.title,
+    "content": Document.content,
+    "file_path": Document.file_path,
+    "embedding": Document.embedding,
+    "created_at": Document.created_at,
+    "is_active": Document.is_active,
+}
+DEFAULT_LIST_FIELDS = "id,title,file_path,created_at,is_active"
+MAX_LIST_LIMIT = 1000
+
+def parse_list_fields(fields: str) -> list[str]:
+    """Validate a comma-separated field list; id is always included for the cursor"""
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(LIST_FIELDS)}"
+        )
+    return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+
+async def list_document_page(
+    db: AsyncSession,
+    fields: str,
+    after_id: Optional[int],
+    limit: int,
+    active_only: bool
+) -> ORJSONResponse:
+    """
+    One page of documents, ordered by id, with only the requested columns
+
+    Keyset pagination: pass the X-Next-After-Id header of a page as after_id
+    to get the next one. The header is absent on the last page.
+    """
+    names = parse_list_fields(fields)
+    query = select(*(LIST_FIELDS[name] for name in names)).order_by(Document.id).limit(limit)
+    if active_only:
+        query = query.where(Document.is_active == True)
+    if after_id is not None:
+        query = query.where(Document.id > after_id)
+
+    rows = (await db.execute(query)).all()
+    documents = [dict(zip(names, row)) for row in rows]
+
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-After-Id"] = str(rows[-1].id)
+    # orjson serializes datetimes and the numpy embedding arrays natively
+    return ORJSONResponse(documents, headers=headers)
+
 @router.get("/", response_model=list[DocumentListResponse])
 async def list_documents(
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    fields: str = Query(DEFAULT_LIST_FIELDS, description=f"Comma-separated subset of: {', '.join(LIST_FIELDS)}"),
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_LIST_LIMIT)
 ):
-    result = await db.execute(
-        select(Document).offset(skip).limit(limit)
-    )
-    documents = result.scalars().all()
-    return documents
+    return await list_document_page(db, fields, after_id, limit, active_only=False)
 
 @router.get("/active", response_model=list[DocumentListResponse])
 async def list_active_documents(
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    fields: str = Query(DEFAULT_LIST_FIELDS, description=f"Comma-separated subset of: {', '.join(LIST_FIELDS)}"),
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_LIST_LIMIT)
 ):
-    result = await db.execute(
-        select(Document)
-        .where(Document.is_active == True)
-        .offset(skip)
-        .limit(limit)
-    )
-    documents = result.scalars().all()
-    return documents
+    return await list_document_page(db, fields, after_id, limit, active_only=True)
 
-@router.put("/{doc_id}/activate", response_model=DocumentResponse)
-async def activate_document(
-    doc_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    await db.execute(
+async def set_document_active(db: AsyncSession, doc_id: int, is_active: bool) -> Document:
+    """Toggle a document and its chunks together in one transaction"""
+    result = await db.execute(
         update(Document)
         .where(Document.id == doc_id)
-        .values(is_active=True)
+        .values(is_active=is_active)
     )
-    await db.commit()
-    
-    result = await db.execute(
-        select(Document).where(Document.id == doc_id)
-    )
-    document = result.scalar_one_or_none()
-    
-    if not document:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
-    
-    return document
 
-@router.put("/{doc_id}/deactivate", response_model=DocumentResponse)
-async def deactivate_document(
-    doc_id: int,
-    db: AsyncSession = Depends(get_db)
-):
+    # Chunks carry a copy of the flag for the partial ANN index
     await db.execute(
-        update(Document)
-        .where(Document.id == doc_id)
-        .values(is_active=False)
+        update(DocumentChunk)
+        .where(DocumentChunk.document_id == doc_id)
+        .values(is_active=is_active)
     )
+    # Cached answers may quote this document
+    await AnswerCache.invalidate_documents(db, [doc_id])
     await db.commit()
     
     result = await db.execute(
         select(Document).where(Document.id == doc_id)
     )
-    document = result.scalar_one_or_none()
-    
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
-    
-    return document
+    return result.scalar_one()
+
+@router.put("/{doc_id}/activate", response_model=DocumentResponse)
+async def activate_document(
+    doc_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    return await set_document_active(db, doc_id, True)
+
+@router.put("/{doc_id}/deactivate", response_model=DocumentResponse)
+async def deactivate_document(
+    doc_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    return await set_document_active(db, doc_id, False)
 
 @router.get("/active-state")
 async def get_active_documents(db: AsyncSession = Depends(get_db)):
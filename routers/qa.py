@@ -1,23 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from services.embedding import embedding_service
-from database import get_db
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from services.embedding import embedding_service, EmbeddingQueueFull
+from database import get_db, AsyncSessionLocal
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from services.retriever import retriever  # Import Retriever class
-from groq import Groq
+from services.retriever import retriever, RETRIEVAL_MODE  # Import Retriever class
+from services.reranker import reranker, RERANK_ENABLED
+from services.batcher import query_batcher
+from services.llm import llm_client
+from services.answer_cache import answer_cache, AnswerCache, AnswerCacheLookup
+from services.metrics import LOG_PAYLOADS, timed
+import json
 import os
 import traceback
 from dotenv import load_dotenv
 
+# Largest number of questions accepted by /qa/query/batch
+QUERY_BATCH_MAX_QUESTIONS = int(os.getenv("QUERY_BATCH_MAX_QUESTIONS", "256"))
+# Largest top_k accepted per question
+MAX_TOP_K = 200
+
 router = APIRouter(prefix="/qa", tags=["Q&A"])
 
 # Request model
 class QueryRequest(BaseModel):
     question: str
-    top_k: Optional[int] = 3
+    top_k: Optional[int] = Field(3, ge=1, le=MAX_TOP_K)
     min_similarity_score: Optional[float] = None
+    # ANN recall/latency trade-off, see Retriever.semantic_search
+    ef_search: Optional[int] = Field(None, ge=1, le=1000)
+    probes: Optional[int] = Field(None, ge=1, le=10000)
+    # Vector-only or vector + full-text; defaults to RETRIEVAL_MODE
+    search_mode: Optional[Literal["semantic", "hybrid"]] = None
+    # Cross-encoder re-ranking; defaults to RERANK_ENABLED
+    rerank: Optional[bool] = None
+    rerank_candidates: Optional[int] = Field(None, ge=1, le=200)
 
 # Response model for individual chunk
 class ChunkResponse(BaseModel):
@@ -25,12 +44,26 @@ class ChunkResponse(BaseModel):
     document_title: str
     document_id: int
     file_path: Optional[str]
+    similarity_score: Optional[float] = None
+    fusion_score: Optional[float] = None  # Hybrid search only
+    rerank_score: Optional[float] = None  # Re-ranked results only
 
 # Response model
 class QueryResponse(BaseModel):
     question: str
     relevant_chunks: List[ChunkResponse]
 
+# Request model for many questions in one call (vector search only)
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=QUERY_BATCH_MAX_QUESTIONS)
+    top_k: Optional[int] = Field(3, ge=1, le=MAX_TOP_K)
+    min_similarity_score: Optional[float] = None
+    ef_search: Optional[int] = Field(None, ge=1, le=1000)
+    probes: Optional[int] = Field(None, ge=1, le=10000)
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
 
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(
@@ -41,10 +74,16 @@ async def query_documents(
     try:
         # Perform semantic search
         #retriever = Retriever(embedding_service=embedding_service)
-        results = await retriever.semantic_search(
+        results = await retriever.search(
             db=db,
             query=request.question,
-            top_k=request.top_k
+            search_mode=request.search_mode,
+            top_k=request.top_k,
+            min_similarity_score=request.min_similarity_score,
+            ef_search=request.ef_search,
+            probes=request.probes,
+            rerank=request.rerank,
+            rerank_candidates=request.rerank_candidates
         )
         
         return {
@@ -52,6 +91,36 @@ async def query_documents(
             "relevant_chunks": results
         }
         
+    except EmbeddingQueueFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(
+    request: BatchQueryRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Semantic search for many questions with one embedding pass and one SQL statement"""
+    try:
+        results = await retriever.batch_semantic_search(
+            queries=request.questions,
+            db=db,
+            top_k=request.top_k or 3,
+            min_similarity_score=request.min_similarity_score,
+            ef_search=request.ef_search,
+            probes=request.probes
+        )
+        
+        return {
+            "results": [
+                {"question": question, "relevant_chunks": chunks}
+                for question, chunks in zip(request.questions, results)
+            ]
+        }
+        
+    except EmbeddingQueueFull:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -62,72 +131,165 @@ async def generate_answer(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        # Generate answer using the updated function
-        answer_result = await generate_answer_with_context(
-            question=request.question, 
-            db=db,
-            retriever=retriever,  # Use the instantiated retriever
-            top_k=request.top_k or 3,
-            min_similarity_score=request.min_similarity_score or 0.5
-        )
+        top_k = request.top_k or 3
+        min_similarity_score = request.min_similarity_score or 0.5
+
+        # Embedded once, for both the answer cache and the retriever
+        question_embedding = await retriever.embed_query(request.question)
+        retrieval_params = answer_cache_params(request, top_k, min_similarity_score)
+        cache_lookup = await lookup_cached_answer(db, question_embedding, retrieval_params)
+
+        if cache_lookup is not None and cache_lookup.hit:
+            answer_result = {
+                "answer": cache_lookup.answer,
+                "context_results": cache_lookup.context_results
+            }
+        else:
+            # Generate answer using the updated function
+            answer_result = await generate_answer_with_context(
+                question=request.question, 
+                db=db,
+                retriever=retriever,  # Use the instantiated retriever
+                top_k=top_k,
+                min_similarity_score=min_similarity_score,
+                ef_search=request.ef_search,
+                probes=request.probes,
+                query_embedding=question_embedding,
+                search_mode=request.search_mode,
+                rerank=request.rerank,
+                rerank_candidates=request.rerank_candidates
+            )
+            await store_cached_answer(db, cache_lookup, request.question, question_embedding, retrieval_params, answer_result)
         
         return {
             "question": request.question,
             "answer": answer_result.get('answer', 'No answer could be generated.'),
+            "cached": cache_lookup is not None and cache_lookup.hit,
             "context_chunks": [
                 {
                     "document_title": result.get('document_title', ''),
                     "chunk_text": result.get('chunk_text', '')[:300] + "...",  # Preview
+                    "similarity_score": result.get('similarity_score'),
                 }
                 for result in answer_result.get('context_results', [])
             ]
         }
         
+    except EmbeddingQueueFull:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def answer_cache_params(request: QueryRequest, top_k: int, min_similarity_score: Optional[float]) -> str:
+    """Retrieval settings that change the context, and so the answer"""
+    rerank = RERANK_ENABLED if request.rerank is None else request.rerank
+    return AnswerCache.retrieval_params(
+        top_k=top_k,
+        min_score=min_similarity_score,
+        mode=request.search_mode or RETRIEVAL_MODE,
+        rerank=(request.rerank_candidates or reranker.candidates) if rerank else None
+    )
+
+async def lookup_cached_answer(
+    db: AsyncSession,
+    question_embedding: List[float],
+    retrieval_params: str
+) -> Optional[AnswerCacheLookup]:
+    """Look the question up in the semantic answer cache; None when disabled or failing"""
+    if answer_cache is None:
+        return None
+    try:
+        return await answer_cache.lookup(db, question_embedding, retrieval_params)
+    except Exception as cache_error:
+        logger.warning(f"Answer cache lookup failed: {cache_error}")
+        await db.rollback()
+        return None
+
+async def store_cached_answer(
+    db: AsyncSession,
+    cache_lookup: Optional[AnswerCacheLookup],
+    question: str,
+    question_embedding: List[float],
+    retrieval_params: str,
+    answer_result: Dict[str, Any]
+) -> None:
+    """Cache a freshly generated answer unless it is an error or has no context"""
+    if cache_lookup is None or "error" in answer_result or not answer_result.get('context_results'):
+        return
+    try:
+        await answer_cache.store(
+            db,
+            question=question,
+            question_embedding=question_embedding,
+            retrieval_params=retrieval_params,
+            document_set_version=cache_lookup.document_set_version,
+            answer=answer_result['answer'],
+            context_results=answer_result['context_results']
+        )
+    except Exception as cache_error:
+        logger.warning(f"Answer cache write failed: {cache_error}")
+        await db.rollback()
     
-# Initialize Groq client
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-logging.basicConfig(
-    level=logging.DEBUG, 
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('qa_debug.log'),  # Log to file
-        logging.StreamHandler()  # Also log to console
-    ]
-)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = (
+    "You are a helpful AI assistant. "
+    "Answer the question based only on the provided context. "
+    "If the context does not contain sufficient information, "
+    "clearly state that you cannot find an answer in the given context."
+)
+
+NO_CONTEXT_ANSWER = "I couldn't find any relevant context to answer your question."
+
+def build_context(context_results: List[Dict[str, Any]]) -> str:
+    """Combine retrieved chunks into the context block of the prompt"""
+    return "\n\n".join([
+        f"Document: {result.get('document_title', 'Unknown')}\n"
+        f"Content: {result.get('chunk_text', '')}" 
+        for result in context_results
+    ])
+
+def build_messages(question: str, context: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
+    ]
+
 async def generate_answer_with_context(
     question: str, 
     db: AsyncSession, 
     retriever: retriever,  
     top_k: int = 3, 
-    min_similarity_score: float = 0.5
+    min_similarity_score: float = 0.5,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    query_embedding: Optional[List[float]] = None,
+    search_mode: Optional[str] = None,
+    rerank: Optional[bool] = None,
+    rerank_candidates: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Generate an answer using semantic search and LLM context retrieval
     """
     try:
-        # Log detailed input parameters
-        logger.debug(f"Input parameters:")
-        logger.debug(f"Question: {question}")
-        logger.debug(f"Top K: {top_k}")
-        logger.debug(f"Min Similarity Score: {min_similarity_score}")
-        
-        # Log retriever details
-        logger.debug(f"Retriever type: {type(retriever)}")
-        
         # Attempt to retrieve context
         try:
-            logger.debug("Starting semantic search...")
-            context_results = await retriever.semantic_search(
+            context_results = await retriever.search(
                 query=question, 
                 db=db, 
-                top_k=top_k
+                search_mode=search_mode,
+                top_k=top_k,
+                min_similarity_score=min_similarity_score,
+                ef_search=ef_search,
+                probes=probes,
+                query_embedding=query_embedding,
+                rerank=rerank,
+                rerank_candidates=rerank_candidates
             )
-            logger.debug(f"Semantic search completed. Results: {context_results}")
+            if LOG_PAYLOADS:
+                logger.info("Retrieved context for %r: %s", question, context_results)
+        except EmbeddingQueueFull:
+            raise
         except Exception as search_error:
             logger.error(f"Semantic search error: {search_error}")
             logger.error(traceback.format_exc())
@@ -142,45 +304,25 @@ async def generate_answer_with_context(
         if not context_results:
             logger.warning("No context results found for the given question.")
             return {
-                "answer": "I couldn't find any relevant context to answer your question.",
+                "answer": NO_CONTEXT_ANSWER,
                 "context_results": [],
                 "raw_context": ""
             }
         
         # Combine context chunks
-        context = "\n\n".join([
-            f"Document: {result.get('document_title', 'Unknown')}\n"
-            f"Content: {result.get('chunk_text', '')}" 
-            for result in context_results
-        ])
+        with timed("prompt_build"):
+            context = build_context(context_results)
+            messages = build_messages(question, context)
         
-        logger.debug(f"Generated context: {context}")
-        
-        # Generate answer using Groq's Llama 3 70B
+        # Generate answer using Groq's Llama 3 70B without blocking the event loop
         try:
-            chat_completion = groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a helpful AI assistant. "
-                            "Answer the question based only on the provided context. "
-                            "If the context does not contain sufficient information, "
-                            "clearly state that you cannot find an answer in the given context."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Context:\n{context}\n\nQuestion: {question}"
-                    }
-                ],
-                model="llama3-70b-8192",
+            answer = await llm_client.complete(
+                messages,
                 temperature=0.3,  # Lower for more factual answers
                 max_tokens=1024
             )
-            
-            answer = chat_completion.choices[0].message.content
-            logger.debug(f"Generated answer: {answer}")
+            if LOG_PAYLOADS:
+                logger.info("Generated answer for %r: %s", question, answer)
             
             return {
                 "answer": answer,
@@ -198,6 +340,8 @@ async def generate_answer_with_context(
                 "error": str(groq_error)
             }
     
+    except EmbeddingQueueFull:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in answer generation: {e}")
         logger.error(traceback.format_exc())
@@ -208,6 +352,102 @@ async def generate_answer_with_context(
             "error": str(e)
         }
     
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/answer/stream")
+async def generate_answer_stream(
+    request: QueryRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream the answer as Server-Sent Events
+
+    Sends one `context` event with the retrieved chunks, a `token` event per
+    generated token as it arrives from the LLM, then `done` (or `error`).
+    A cached answer is sent as a single `token` event.
+    """
+    top_k = request.top_k or 3
+    min_similarity_score = request.min_similarity_score or 0.5
+
+    question_embedding = await retriever.embed_query(request.question)
+    retrieval_params = answer_cache_params(request, top_k, min_similarity_score)
+    cache_lookup = await lookup_cached_answer(db, question_embedding, retrieval_params)
+
+    if cache_lookup is not None and cache_lookup.hit:
+        context_results = cache_lookup.context_results
+    else:
+        context_results = await retriever.search(
+            query=request.question,
+            db=db,
+            search_mode=request.search_mode,
+            top_k=top_k,
+            min_similarity_score=min_similarity_score,
+            ef_search=request.ef_search,
+            probes=request.probes,
+            query_embedding=question_embedding,
+            rerank=request.rerank,
+            rerank_candidates=request.rerank_candidates
+        )
+
+    async def events():
+        yield sse_event("context", [
+            {
+                "document_title": result.get('document_title', ''),
+                "document_id": result.get('document_id'),
+                "similarity_score": result.get('similarity_score'),
+            }
+            for result in context_results
+        ])
+        if cache_lookup is not None and cache_lookup.hit:
+            yield sse_event("token", cache_lookup.answer)
+            yield sse_event("done", {"cached": True})
+            return
+        if not context_results:
+            yield sse_event("token", NO_CONTEXT_ANSWER)
+            yield sse_event("done", {})
+            return
+
+        with timed("prompt_build"):
+            messages = build_messages(request.question, build_context(context_results))
+        tokens = []
+        try:
+            async for token in llm_client.stream(messages, temperature=0.3, max_tokens=1024):
+                tokens.append(token)
+                yield sse_event("token", token)
+        except Exception as llm_error:
+            logger.error(f"Groq API streaming error: {llm_error}")
+            yield sse_event("error", {"detail": str(llm_error)})
+            return
+        yield sse_event("done", {})
+
+        # The request's session is closed once streaming starts, so use a fresh one
+        async with AsyncSessionLocal() as cache_db:
+            await store_cached_answer(
+                cache_db, cache_lookup, request.question, question_embedding, retrieval_params,
+                {"answer": "".join(tokens), "context_results": context_results}
+            )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/embedding-stats")
+async def embedding_stats():
+    """Diagnostic endpoint for query micro-batching, embedding queue depth, cache hits and re-ranking"""
+    return {
+        "executor": embedding_service.executor_type,
+        "pending_jobs": embedding_service.pending_jobs(),
+        "query_batcher": query_batcher.stats(),
+        "cache": embedding_service.cache.stats() if embedding_service.cache else None,
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "reranker": reranker.stats(),
+    }
+
 @router.get("/debug-context")
 async def debug_context(
     question: str,
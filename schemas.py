@@ -17,18 +17,43 @@ class DocumentResponse(DocumentBase):
     class Config:
         from_attributes = True
 
+class DocumentReindexResponse(DocumentResponse):
+    num_chunks: int
+    chunks_reused: int
+    chunks_embedded: int
+    chunks_removed: int
+    total_document_length: int
+
 class DocumentListResponse(BaseModel):
+    # Only id is always present; the rest depend on the ?fields= selection
     id: int
-    title: str
-    content: Optional[str]
-    embedding: Optional[list[float]]
-    created_at: datetime
-    is_active: bool
+    title: Optional[str] = None
+    content: Optional[str] = None
+    file_path: Optional[str] = None
+    embedding: Optional[list[float]] = None
+    created_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class DocumentUpdate(DocumentBase):  
     title: Optional[str] = None
     content: Optional[str] = None
     is_active: Optional[bool] = None
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    status: str
+    filename: str
+    document_id: Optional[int] = None
+    pages_extracted: int
+    chunks_embedded: int
+    rows_written: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
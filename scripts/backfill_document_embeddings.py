@@ -0,0 +1,62 @@
+"""
+Recompute Document.embedding as the pooled vector of each document's chunks
+
+Documents are processed in id order, --batch-size at a time, with one commit
+per batch, so the command can be interrupted and resumed with --after-id.
+
+    python -m scripts.backfill_document_embeddings --batch-size 100
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal
+from models import Document, DocumentChunk
+from services.embedding import PooledEmbedding
+
+
+async def backfill(batch_size: int, after_id: int, only_missing: bool) -> None:
+    updated = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(Document.id).where(Document.id > after_id).order_by(Document.id).limit(batch_size)
+            if only_missing:
+                query = query.where(Document.embedding.is_(None))
+            document_ids = (await db.execute(query)).scalars().all()
+            if not document_ids:
+                break
+
+            pools = defaultdict(PooledEmbedding)
+            rows = await db.execute(
+                select(DocumentChunk.document_id, DocumentChunk.text, DocumentChunk.embedding)
+                .where(
+                    DocumentChunk.document_id.in_(document_ids),
+                    DocumentChunk.embedding.is_not(None)
+                )
+            )
+            for document_id, text, embedding in rows.tuples():
+                pools[document_id].add([list(embedding)], [len(text)])
+
+            for document_id in document_ids:
+                embedding = pools[document_id].result() if document_id in pools else None
+                await db.execute(
+                    update(Document)
+                    .where(Document.id == document_id)
+                    .values(embedding=embedding)
+                )
+            await db.commit()
+
+        updated += len(document_ids)
+        after_id = document_ids[-1]
+        print(f"Updated {updated} documents (last id {after_id})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--after-id", type=int, default=0, help="Resume after this document id")
+    parser.add_argument("--only-missing", action="store_true", help="Skip documents that already have an embedding")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.after_id, args.only_missing))
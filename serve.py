@@ -0,0 +1,127 @@
+"""
+Pre-fork server: load the embedding model once, then fork uvicorn workers
+
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker imports the
+app and loads its own copy of the model. Here the master process imports the
+app (and with it the model) and binds the listening socket, then forks. The
+workers share the model's weight pages copy-on-write: tensors are never
+written during inference, so resident memory grows by each worker's own
+heap rather than by a full model per worker.
+
+Linux/macOS only (needs fork). Requires EMBEDDING_EXECUTOR=thread; the
+process executor loads models in its own pool processes instead.
+"""
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+def run_worker(config, sock, workers: int) -> None:
+    """Body of a forked worker; never returns"""
+    import torch
+    import uvicorn
+
+    # Split the cores between workers instead of every worker using all of them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+    os._exit(0)
+
+
+def main() -> None:
+    args = parse_args()
+    # Read by database.py to size each worker's connection pool
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
+    # Each worker writes its metrics here and /metrics merges them; files
+    # from an earlier run would be counted again, so start empty
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(metrics_dir, name))
+
+    import uvicorn
+    from services.embedding import embedding_service
+
+    if embedding_service.executor_type != "thread":
+        sys.exit("serve.py shares the model between workers and needs EMBEDDING_EXECUTOR=thread")
+
+    # Import the app and load the model in this process, before any fork.
+    # Nothing here may open database connections, start threads or create
+    # event-loop objects; the app creates those on first use in each worker.
+    from main import app
+
+    embedding_service.load()
+    embedding_service.ready = True  # Workers inherit the loaded model
+
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    sock = config.bind_socket()
+
+    # Keep the garbage collector from touching (and so copying) the
+    # pre-fork objects in every worker
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            run_worker(config, sock, args.workers)
+        children[pid] = time.monotonic()
+
+    for _ in range(args.workers):
+        spawn()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers (master pid {os.getpid()})")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        # Do not spin if workers die right after starting
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+from typing import Any, Dict, List, Optional, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import BigInteger, Float, Integer, Text, JSON, delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import logging
+import os
+import random
+
+from models import AnswerCacheEntry, DocumentSetVersion
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity a new question needs to an earlier one to reuse its answer
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+# Eviction runs on about one write in this many, not on every write
+ANSWER_CACHE_EVICT_EVERY = int(os.getenv("ANSWER_CACHE_EVICT_EVERY", "100"))
+# Most rows one eviction pass deletes, so no write pays for a large backlog
+ANSWER_CACHE_EVICT_BATCH = int(os.getenv("ANSWER_CACHE_EVICT_BATCH", "1000"))
+
+# Current document set version and the nearest cached question for it, in one
+# round trip; the version row is read by primary key
+LOOKUP_SQL = text("""
+WITH current_set AS (
+    SELECT coalesce((SELECT version FROM document_set_version WHERE id = 1), 0) AS version
+)
+SELECT current_set.version AS document_set_version, hit.id, hit.answer, hit.context, hit.similarity
+FROM current_set
+LEFT JOIN LATERAL (
+    SELECT id, answer, context,
+           -(question_embedding <#> CAST(:embedding AS vector)) AS similarity
+    FROM answer_cache
+    WHERE document_set_version = current_set.version
+      AND retrieval_params = :retrieval_params
+      AND expires_at > now()
+    ORDER BY question_embedding <#> CAST(:embedding AS vector)
+    LIMIT 1
+) hit ON true
+""").columns(
+    document_set_version=BigInteger,
+    id=Integer,
+    answer=Text,
+    context=JSON,
+    similarity=Float,
+)
+
+
+@dataclass
+class AnswerCacheLookup:
+    document_set_version: int
+    answer: Optional[str] = None
+    context_results: Optional[List[Dict[str, Any]]] = None
+    similarity: Optional[float] = None
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        min_similarity: float = ANSWER_CACHE_MIN_SIMILARITY,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        evict_every: int = ANSWER_CACHE_EVICT_EVERY,
+        evict_batch: int = ANSWER_CACHE_EVICT_BATCH,
+    ):
+        """
+        Semantic cache of generated answers, keyed on the question embedding
+
+        A lookup returns the answer of the most similar earlier question if it
+        lies within min_similarity and was produced with the same retrieval
+        settings under the current document set version. Every transaction
+        that uploads, re-indexes, activates or deactivates a document bumps
+        that version, and an entry is stored under the version read when its
+        request started, so an answer that raced with a change never matches.
+        Entries expire after ttl_seconds, the oldest are dropped beyond
+        max_entries, and entries built from a changed document are deleted.
+        Lookups ignore expired entries, so eviction only reclaims space and
+        runs now and then.
+
+        Args:
+            min_similarity (float): Minimum cosine similarity for a hit
+            ttl_seconds (int): Lifetime of an entry
+            max_entries (int): Maximum number of entries kept
+            evict_every (int): Evict on about one write in this many
+            evict_batch (int): Most entries deleted per eviction pass and reason
+        """
+        self.min_similarity = min_similarity
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.evict_batch = evict_batch
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def retrieval_params(**settings: Any) -> str:
+        """Cache key part for the retrieval settings an answer was produced with"""
+        return ";".join(f"{name}={value}" for name, value in sorted(settings.items()))
+
+    @staticmethod
+    def _vector_literal(embedding: Sequence[float]) -> str:
+        return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        question_embedding: Sequence[float],
+        retrieval_params: str
+    ) -> AnswerCacheLookup:
+        row = (await db.execute(LOOKUP_SQL, {
+            "embedding": self._vector_literal(question_embedding),
+            "retrieval_params": retrieval_params,
+        })).one()
+
+        if row.id is not None and row.similarity >= self.min_similarity:
+            self.hits += 1
+            return AnswerCacheLookup(
+                document_set_version=row.document_set_version,
+                answer=row.answer,
+                context_results=row.context,
+                similarity=row.similarity,
+            )
+        self.misses += 1
+        return AnswerCacheLookup(document_set_version=row.document_set_version)
+
+    async def store(
+        self,
+        db: AsyncSession,
+        question: str,
+        question_embedding: Sequence[float],
+        retrieval_params: str,
+        document_set_version: int,
+        answer: str,
+        context_results: List[Dict[str, Any]]
+    ) -> None:
+        """Save an answer, occasionally evict old entries, then commit"""
+        db.add(AnswerCacheEntry(
+            question=question,
+            question_embedding=list(question_embedding),
+            retrieval_params=retrieval_params,
+            document_set_version=document_set_version,
+            document_ids=sorted({result['document_id'] for result in context_results}),
+            answer=answer,
+            context=context_results,
+            expires_at=datetime.now(timezone.utc) + self.ttl,
+        ))
+        if random.random() * self.evict_every < 1:
+            await self.evict(db)
+        await db.commit()
+
+    async def evict(self, db: AsyncSession) -> int:
+        """
+        Delete up to evict_batch expired entries and up to evict_batch beyond max_entries
+
+        Both deletes walk an index (expires_at, and the primary key for age)
+        instead of scanning the table. Runs in the caller's transaction.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        expired = (
+            select(AnswerCacheEntry.id)
+            .where(AnswerCacheEntry.expires_at <= datetime.now(timezone.utc))
+            .order_by(AnswerCacheEntry.expires_at)
+            .limit(self.evict_batch)
+        )
+        # Id of the newest entry that no longer fits; ids grow with insertion
+        oldest_kept = (
+            select(AnswerCacheEntry.id)
+            .order_by(AnswerCacheEntry.id.desc())
+            .offset(self.max_entries)
+            .limit(1)
+            .scalar_subquery()
+        )
+        overflow = (
+            select(AnswerCacheEntry.id)
+            .where(AnswerCacheEntry.id <= oldest_kept)
+            .order_by(AnswerCacheEntry.id)
+            .limit(self.evict_batch)
+        )
+        deleted = 0
+        for candidates in (expired, overflow):
+            result = await db.execute(
+                delete(AnswerCacheEntry)
+                .where(AnswerCacheEntry.id.in_(candidates))
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+        return deleted
+
+    @staticmethod
+    async def bump_version(db: AsyncSession) -> None:
+        """
+        Move to a new document set version in the caller's transaction
+
+        Locks the version row until the transaction ends, so call it last,
+        just before committing.
+        """
+        statement = insert(DocumentSetVersion).values(id=1, version=1)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[DocumentSetVersion.id],
+            set_={"version": DocumentSetVersion.version + 1},
+        ))
+
+    @staticmethod
+    async def invalidate_documents(db: AsyncSession, document_ids: Sequence[int]) -> None:
+        """
+        Drop entries built from any of the documents and bump the version
+
+        Runs in the caller's transaction; call it just before committing.
+        """
+        await AnswerCache.bump_version(db)
+        await db.execute(
+            delete(AnswerCacheEntry)
+            .where(AnswerCacheEntry.document_ids.overlap(list(document_ids)))
+            .execution_options(synchronize_session=False)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "min_similarity": self.min_similarity,
+            "ttl_seconds": self.ttl.total_seconds(),
+            "max_entries": self.max_entries,
+        }
+
+answer_cache = AnswerCache() if ANSWER_CACHE_ENABLED else None
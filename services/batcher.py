@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import asyncio
+import os
+import time
+
+from services.embedding import embedding_service
+
+load_dotenv()
+
+# Time the first query of a batch waits for others to join it
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+
+
+class QueryBatcher:
+    def __init__(
+        self,
+        embedding_service,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    ):
+        """
+        Collect concurrent query embeddings into batched forward passes
+
+        Args:
+            embedding_service: Embedding generation service
+            window_ms (float): Maximum time a query waits for a batch to fill
+            max_batch_size (int): Batch size that triggers an immediate flush
+        """
+        self.embedding_service = embedding_service
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Keep references so running batches are not garbage collected
+        self._tasks: set = set()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single query text as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            delay = started - enqueued
+            self.total_queue_delay += delay
+            self.max_queue_delay = max(self.max_queue_delay, delay)
+        self.batches += 1
+        self.items += len(batch)
+
+        try:
+            embeddings = await self.embedding_service.generate_batch_embeddings(
+                [text for text, _, _ in batch]
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            # The caller may have been cancelled while the batch was running
+            if not future.done():
+                future.set_result(embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch-fill ratio and queueing delay since startup"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_fill_ratio": (
+                self.items / (self.batches * self.max_batch_size) if self.batches else 0.0
+            ),
+            "avg_queue_delay_ms": (
+                self.total_queue_delay / self.items * 1000 if self.items else 0.0
+            ),
+            "max_queue_delay_ms": self.max_queue_delay * 1000,
+        }
+
+query_batcher = QueryBatcher(embedding_service=embedding_service)
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import json
+
+# Per-connection scratch table the COPY lands in before the real insert
+STAGING_TABLE = "document_chunks_staging"
+
+STAGING_DDL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    document_id integer NOT NULL,
+    text text NOT NULL,
+    embedding real[],
+    meta_data text,
+    is_active boolean NOT NULL,
+    content_hash varchar(64)
+) ON COMMIT DELETE ROWS
+"""
+
+INSERT_FROM_STAGING = f"""
+INSERT INTO document_chunks (document_id, text, embedding, meta_data, is_active, content_hash)
+SELECT document_id, text, embedding::vector, meta_data::json, is_active, content_hash
+FROM {STAGING_TABLE}
+RETURNING id
+"""
+
+
+def content_hash(text: str) -> str:
+    """Hash stored in DocumentChunk.content_hash; matches sha256(convert_to(text, 'UTF8')) in SQL"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkRow(NamedTuple):
+    document_id: int
+    text: str
+    embedding: Optional[List[float]]
+    meta_data: Optional[Dict[str, Any]]
+    is_active: bool = True
+
+
+async def bulk_insert_chunks(db: AsyncSession, rows: Sequence[ChunkRow]) -> List[int]:
+    """
+    Insert DocumentChunk rows with one binary COPY and one INSERT ... RETURNING
+
+    Vectors travel as binary float4[] (asyncpg has a native codec for it) and
+    are cast to vector inside Postgres, so nothing is formatted as text and
+    no per-row round trips are made. Runs inside the session's transaction.
+
+    Args:
+        db: Database session
+        rows (Sequence[ChunkRow]): Chunks to insert
+
+    Returns:
+        List[int]: Ids of the inserted chunks, in insertion order
+    """
+    if not rows:
+        return []
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver = raw_connection.driver_connection  # asyncpg.Connection
+
+    await driver.execute(STAGING_DDL)
+    await driver.copy_records_to_table(
+        STAGING_TABLE,
+        records=[
+            (
+                row.document_id,
+                row.text,
+                row.embedding,
+                json.dumps(row.meta_data) if row.meta_data is not None else None,
+                row.is_active,
+                content_hash(row.text),
+            )
+            for row in rows
+        ],
+        columns=["document_id", "text", "embedding", "meta_data", "is_active", "content_hash"],
+    )
+    records = await driver.fetch(INSERT_FROM_STAGING)
+    # Several batches can share one transaction, so empty the table now
+    await driver.execute(f"TRUNCATE {STAGING_TABLE}")
+    return [record["id"] for record in records]
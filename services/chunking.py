@@ -0,0 +1,167 @@
+from typing import List, NamedTuple, Optional, Tuple
+import hashlib
+import re
+
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) and the
+# whitespace after it, or a blank line
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\'”’)\]]*\s+|\n\s*\n\s*')
+# Text without any boundary is cut here so the carried buffer stays bounded
+MAX_SENTENCE_CHARS = 10_000
+
+
+def is_cut_point(sentence: str, num_tokens: int, target_tokens: int) -> bool:
+    """
+    Whether a chunk should end after this sentence, judged by its text alone
+
+    A sentence qualifies with probability num_tokens / target_tokens, decided
+    by a stable hash, so chunks average about target_tokens and every copy
+    of the same sentence makes the same decision wherever it appears.
+    """
+    digest = hashlib.blake2b(sentence.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < (num_tokens / target_tokens) * 2 ** 64
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int  # Character offsets into the full document text
+    end: int
+    num_tokens: int
+
+
+class SentenceChunker:
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: int,
+        target_tokens: Optional[int] = None,
+        min_tokens: Optional[int] = None
+    ):
+        """
+        Streaming chunker that packs whole sentences up to a token budget
+
+        Text is fed one segment at a time and scanned once. Sentences are
+        measured with the model's tokenizer, so chunks end on sentence
+        boundaries and never exceed what the model reads. Only a sentence
+        that is longer than the budget on its own is split, at token
+        boundaries. Chunks do not overlap; each records its (start, end)
+        character offsets in the concatenated text.
+
+        Boundaries are content-defined: a chunk ends after a sentence whose
+        hash marks it as a cut point (see is_cut_point), and only falls back
+        to ending where the budget runs out. Editing one sentence therefore
+        changes the chunks around it, while later chunks line up again at
+        the next cut point, so re-indexing an edited document re-embeds
+        only a few chunks.
+
+        Args:
+            tokenizer: Hugging Face tokenizer of the embedding model
+            max_tokens (int): Token budget per chunk, excluding special tokens
+            target_tokens (int, optional): Average chunk size aimed for;
+                defaults to half the budget
+            min_tokens (int, optional): Cut points are ignored in chunks
+                smaller than this; defaults to an eighth of the budget
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.target_tokens = target_tokens or max(1, max_tokens // 2)
+        self.min_tokens = min_tokens if min_tokens is not None else max_tokens // 8
+
+        self._buffer = ""         # Text after the last complete sentence
+        self._buffer_start = 0    # Offset of _buffer[0] in the document
+
+        self._parts: List[str] = []  # Sentences of the chunk being packed
+        self._chunk_start = 0
+        self._chunk_tokens = 0
+
+    def feed(self, segment: str) -> List[Chunk]:
+        """Add text and return the chunks that are now complete"""
+        self._buffer += segment
+        sentences = []
+        position = 0
+        for match in SENTENCE_BOUNDARY.finditer(self._buffer):
+            # Whitespace reaching the end of the buffer may continue in the next segment
+            if match.end() == len(self._buffer):
+                break
+            sentences.append((position, match.end()))
+            position = match.end()
+
+        if len(self._buffer) - position > MAX_SENTENCE_CHARS:
+            sentences.append((position, len(self._buffer)))
+            position = len(self._buffer)
+
+        chunks = self._pack(sentences)
+        self._buffer_start += position
+        self._buffer = self._buffer[position:]
+        return chunks
+
+    def finish(self) -> List[Chunk]:
+        """Return the remaining chunks at the end of the text"""
+        chunks = self._pack([(0, len(self._buffer))] if self._buffer else [])
+        self._buffer_start += len(self._buffer)
+        self._buffer = ""
+        chunk = self._close()
+        if chunk is not None:
+            chunks.append(chunk)
+        return chunks
+
+    def _pack(self, spans: List[Tuple[int, int]]) -> List[Chunk]:
+        if not spans:
+            return []
+        texts = [self._buffer[start:end] for start, end in spans]
+        token_counts = [
+            len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        ]
+
+        chunks = []
+        for (start, _), text, num_tokens in zip(spans, texts, token_counts):
+            offset = self._buffer_start + start
+            if num_tokens > self.max_tokens:
+                chunk = self._close()
+                if chunk is not None:
+                    chunks.append(chunk)
+                chunks.extend(self._split_sentence(text, offset))
+                continue
+
+            if self._chunk_tokens + num_tokens > self.max_tokens:
+                chunk = self._close()
+                if chunk is not None:
+                    chunks.append(chunk)
+            if not self._parts:
+                self._chunk_start = offset
+            self._parts.append(text)
+            self._chunk_tokens += num_tokens
+
+            if self._chunk_tokens >= self.min_tokens and is_cut_point(text, num_tokens, self.target_tokens):
+                chunks.append(self._close())
+        return chunks
+
+    def _split_sentence(self, text: str, offset: int) -> List[Chunk]:
+        """Cut an over-long sentence into pieces of at most max_tokens tokens"""
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        token_offsets = encoding["offset_mapping"]
+        chunks = []
+        for first in range(0, len(token_offsets), self.max_tokens):
+            window = token_offsets[first:first + self.max_tokens]
+            start = window[0][0]
+            # Extend to the next token so the text between them is not lost
+            end = token_offsets[first + self.max_tokens][0] if first + self.max_tokens < len(token_offsets) else len(text)
+            chunk = self._make_chunk(text[start:end], offset + start, len(window))
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    def _close(self):
+        if not self._parts:
+            return None
+        chunk = self._make_chunk("".join(self._parts), self._chunk_start, self._chunk_tokens)
+        self._parts = []
+        self._chunk_tokens = 0
+        return chunk
+
+    @staticmethod
+    def _make_chunk(text: str, start: int, num_tokens: int):
+        stripped = text.strip()
+        if not stripped:
+            return None
+        start += len(text) - len(text.lstrip())
+        return Chunk(stripped, start, start + len(stripped), num_tokens)
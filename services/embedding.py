@@ -19,25 +19,200 @@
 
 # embedding_service = EmbeddingService()
 
-from langchain.embeddings import SentenceTransformerEmbeddings
-from typing import List, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from dotenv import load_dotenv
+import asyncio
+import os
+import threading
+import time
+
+from services.chunking import SentenceChunker
+from services.embedding_cache import EmbeddingCache
+from services.metrics import observe
+
+if TYPE_CHECKING:
+    from langchain.embeddings import SentenceTransformerEmbeddings
 
 load_dotenv()
 
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en-v1.5")
+# "thread" shares one model between worker threads (torch releases the GIL during
+# a forward pass); "process" loads one model per worker process.
+EMBEDDING_EXECUTOR = os.getenv("EMBEDDING_EXECUTOR", "thread")
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS") or "0") or None
+# Maximum number of embedding jobs submitted or waiting for a worker
+EMBEDDING_MAX_PENDING = int(os.getenv("EMBEDDING_MAX_PENDING", "64"))
+# Seconds a caller waits for a free slot before the request is rejected
+EMBEDDING_QUEUE_TIMEOUT = float(os.getenv("EMBEDDING_QUEUE_TIMEOUT", "30"))
+
+
+class EmbeddingQueueFull(Exception):
+    """Raised when the embedding backend stays saturated past the queue timeout"""
+
+
+def load_model(model_name: str) -> "SentenceTransformerEmbeddings":
+    # Imported here: langchain and torch take seconds to import
+    from langchain.embeddings import SentenceTransformerEmbeddings
+
+    # Unit-length vectors make inner product equal to cosine similarity
+    return SentenceTransformerEmbeddings(
+        model_name=model_name,
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+# Model owned by a process pool worker, loaded once by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, num_threads: int) -> None:
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(num_threads)
+    _worker_model = load_model(model_name)
+
+
+def _worker_embed_documents(texts: List[str]) -> List[List[float]]:
+    return _worker_model.embed_documents(texts)
+
+
+class PooledEmbedding:
+    def __init__(self):
+        """
+        Running length-weighted mean of chunk embeddings
+
+        Chunks are weighted by their character length, so the pooled vector
+        reflects how much of the document each chunk covers. The result is
+        normalized like every other stored embedding.
+        """
+        self._total = None
+        self._weight = 0.0
+
+    def add(self, embeddings: List[List[float]], weights: List[float]) -> None:
+        import numpy as np
+
+        if not embeddings:
+            return
+        weights_array = np.asarray(weights, dtype=np.float64)
+        batch_sum = weights_array @ np.asarray(embeddings, dtype=np.float64)
+        self._total = batch_sum if self._total is None else self._total + batch_sum
+        self._weight += float(weights_array.sum())
+
+    def result(self) -> Optional[List[float]]:
+        import numpy as np
+
+        if self._total is None or self._weight == 0:
+            return None
+        norm = np.linalg.norm(self._total)
+        if norm == 0:
+            return None
+        return (self._total / norm).tolist()
+
+
 class EmbeddingService:
-    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50):
+    def __init__(
+        self,
+        chunk_size: int = 512,
+        executor: str = EMBEDDING_EXECUTOR,
+        max_workers: Optional[int] = EMBEDDING_WORKERS,
+        max_pending: int = EMBEDDING_MAX_PENDING,
+        queue_timeout: float = EMBEDDING_QUEUE_TIMEOUT,
+        use_cache: bool = True,
+    ):
         """
         Initialize the Embedding Service with text chunking capabilities
         
         Args:
-            chunk_size (int): Maximum number of tokens/characters per chunk
-            chunk_overlap (int): Number of tokens/characters to overlap between chunks
+            chunk_size (int): Maximum number of model tokens per chunk, including
+                the special tokens the model adds; capped at the model's limit
+            executor (str): Inference backend, "thread" or "process"
+            max_workers (int, optional): Number of inference workers
+            max_pending (int): Maximum number of in-flight embedding jobs
+            queue_timeout (float): Seconds to wait for a free slot before failing
+            use_cache (bool): Look embeddings up in the EmbeddingCache before inference
         """
-        # Using sentence-transformers directly
-        self.embed_model = SentenceTransformerEmbeddings(model_name="BAAI/bge-small-en-v1.5")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown embedding executor: {executor}")
+
+        self.model_name = EMBEDDING_MODEL_NAME
+        self.executor_type = executor
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
         self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+        self._tokenizer = None
+        self.cache = EmbeddingCache(self.model_name) if use_cache else None
+
+        if executor == "process":
+            # Each worker process loads its own copy of the model
+            self.max_workers = max_workers or os.cpu_count() or 1
+        else:
+            # torch already spreads a single forward pass over all cores
+            self.max_workers = max_workers or 1
+
+        # Loaded on first use or by warm_up(), so importing the app stays fast
+        self._embed_model = None
+        self._load_lock = threading.Lock()
+        # Fast tokenizers reconfigure themselves on every call and fail when
+        # two threads use one at the same time
+        self._tokenizer_lock = threading.Lock()
+        self.ready = False
+
+        # Created on first use so they bind to the running event loop / process
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                threads_per_worker = max(1, (os.cpu_count() or 1) // self.max_workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.model_name, threads_per_worker),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="embedding",
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        """Run an inference call on the worker pool, applying backpressure"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise EmbeddingQueueFull(
+                f"Embedding backend busy: {self.max_pending} jobs pending"
+            )
+        finally:
+            observe("embedding_queue_wait", time.perf_counter() - started)
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            observe("embedding_inference", time.perf_counter() - started)
+            self._pending -= 1
+            self._slots.release()
+
+    def pending_jobs(self) -> int:
+        """Number of embedding jobs currently holding a queue slot"""
+        return self._pending
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def chunk_text(self, text: str) -> List[str]:
         """
@@ -49,13 +224,63 @@ class EmbeddingService:
         Returns:
             List[str]: List of text chunks
         """
-        # Simple chunking strategy using character-based splitting
-        chunks = []
-        for start in range(0, len(text), self.chunk_size - self.chunk_overlap):
-            chunk = text[start:start + self.chunk_size]
-            chunks.append(chunk)
-        
-        return chunks
+        chunker = self.chunker()
+        return [chunk.text for chunk in chunker.feed(text) + chunker.finish()]
+
+    @property
+    def embed_model(self) -> "SentenceTransformerEmbeddings":
+        """The in-process model (thread executor); loaded on first access"""
+        if self._embed_model is None:
+            with self._load_lock:
+                if self._embed_model is None:
+                    self._embed_model = load_model(self.model_name)
+        return self._embed_model
+
+    def load(self) -> None:
+        """Load the tokenizer and, for the thread executor, the model; blocking"""
+        self.tokenizer
+        if self.executor_type == "thread":
+            self.embed_model
+
+    async def warm_up(self) -> None:
+        """Load everything off the event loop and run one embedding, then mark ready"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.load)
+        # Also starts the process pool workers, which load their own models
+        await self._embed_documents(["warm up"])
+        self.ready = True
+
+    @property
+    def tokenizer(self):
+        """The model's tokenizer, loaded on its own so chunking works in any executor mode"""
+        if self._tokenizer is None:
+            with self._load_lock:
+                if self._tokenizer is None:
+                    from transformers import AutoTokenizer
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    def _locked_tokenizer_call(self, fn, *args):
+        with self._tokenizer_lock:
+            return fn(*args)
+
+    async def run_tokenizer(self, fn, *args):
+        """
+        Run tokenizer-bound work, such as creating a chunker or feeding it, off the event loop
+
+        The first call may load the tokenizer from disk or the network. Calls
+        run one at a time in the default thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._locked_tokenizer_call, fn, *args)
+
+    def chunker(self) -> SentenceChunker:
+        """Create an incremental chunker for text that arrives in pieces"""
+        tokenizer = self.tokenizer
+        max_length = min(self.chunk_size, tokenizer.model_max_length)
+        # Leave room for [CLS] and [SEP]
+        budget = max_length - tokenizer.num_special_tokens_to_add()
+        return SentenceChunker(tokenizer, budget)
 
     async def chunk_and_embed(self, text: str) -> Tuple[List[str], List[List[float]]]:
         """
@@ -67,16 +292,51 @@ class EmbeddingService:
         Returns:
             Tuple of chunks and their corresponding embeddings
         """
-        chunks = self.chunk_text(text)
-        embeddings = await self.generate_batch_embeddings(chunks)
+        chunks = await self.run_tokenizer(self.chunk_text, text)
+        embeddings = await self.generate_batch_embeddings(chunks, persistent_cache=True)
         return chunks, embeddings
 
     async def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for a single text"""
-        return self.embed_model.embed_query(text)
+        return (await self.generate_batch_embeddings([text]))[0]
+
+    async def generate_batch_embeddings(
+        self,
+        texts: List[str],
+        persistent_cache: bool = False
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts, running the model only on cache misses
+
+        Args:
+            texts (List[str]): Texts to embed
+            persistent_cache (bool): Also use the Postgres cache tier; meant
+                for document chunks, not for queries on the request path
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return await self._embed_documents(texts)
+
+        embeddings = await self.cache.get_many(texts, persistent=persistent_cache)
+        missing = list({text: None for text, embedding in zip(texts, embeddings) if embedding is None})
+        if missing:
+            computed = dict(zip(missing, await self._embed_documents(missing)))
+            await self.cache.put_many(missing, [computed[text] for text in missing], persistent=persistent_cache)
+            embeddings = [
+                embedding if embedding is not None else computed[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
+        return embeddings
+
+    async def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # embed_query is embed_documents on a single text for this model
+        if self.executor_type == "process":
+            return await self._run(_worker_embed_documents, texts)
+        return await self._run(self._thread_embed_documents, texts)
 
-    async def generate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+    def _thread_embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Runs on the executor, so a first-use model load never blocks the event loop
         return self.embed_model.embed_documents(texts)
 
 embedding_service = EmbeddingService()
\ No newline at end of file
@@ -0,0 +1,233 @@
+from typing import Any, Dict, List, Optional, Sequence
+from collections import OrderedDict
+from array import array
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import hashlib
+import logging
+import os
+import random
+import sys
+
+from database import AsyncSessionLocal
+from models import EmbeddingCacheEntry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_MEMORY_MB = float(os.getenv("EMBEDDING_CACHE_MEMORY_MB", "64"))
+EMBEDDING_CACHE_PERSISTENT = os.getenv("EMBEDDING_CACHE_PERSISTENT", "true").lower() == "true"
+# Rows kept in the embedding_cache table; the least recently used go first
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "1000000"))
+# Eviction runs on about one write in this many, not on every write
+EMBEDDING_CACHE_EVICT_EVERY = int(os.getenv("EMBEDDING_CACHE_EVICT_EVERY", "100"))
+# Most rows one eviction pass deletes
+EMBEDDING_CACHE_EVICT_BATCH = int(os.getenv("EMBEDDING_CACHE_EVICT_BATCH", "1000"))
+# A hit refreshes last_used_at only when it is older than this, so hits rarely write
+TOUCH_INTERVAL = timedelta(hours=1)
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        model_name: str,
+        max_memory_bytes: int = int(EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024),
+        persistent: bool = EMBEDDING_CACHE_PERSISTENT,
+        max_rows: int = EMBEDDING_CACHE_MAX_ROWS,
+        evict_every: int = EMBEDDING_CACHE_EVICT_EVERY,
+        evict_batch: int = EMBEDDING_CACHE_EVICT_BATCH,
+    ):
+        """
+        Two-tier embedding cache keyed by a hash of (model name, normalized text)
+
+        The first tier is an in-process LRU holding float32 arrays up to a
+        memory cap; the second is the embedding_cache table, shared by every
+        process and kept across restarts. Only callers that ask for it use
+        the table: document chunks do, query embeddings do not, so a query
+        never waits on extra database round trips. The table is kept to
+        max_rows by occasionally deleting the least recently used rows.
+
+        Args:
+            model_name (str): Embedding model the cached vectors belong to
+            max_memory_bytes (int): Memory cap of the in-process tier
+            persistent (bool): Whether to use the Postgres tier
+            max_rows (int): Rows kept in the Postgres tier
+            evict_every (int): Evict on about one write in this many
+            evict_batch (int): Most rows deleted per eviction pass
+        """
+        self.model_name = model_name
+        self.max_memory_bytes = max_memory_bytes
+        self.persistent = persistent
+        self.max_rows = max_rows
+        self.evict_every = evict_every
+        self.evict_batch = evict_batch
+
+        self._entries: "OrderedDict[str, array]" = OrderedDict()
+        self.memory_bytes = 0
+
+        # Counters
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        # Whitespace runs do not change the tokens the model sees
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_size(key: str, vector: array) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(vector)
+
+    def _remember(self, key: str, embedding: Sequence[float]) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        # Model output is float32, so this is lossless and ~8x smaller than a list
+        vector = array("f", embedding)
+        self._entries[key] = vector
+        self.memory_bytes += self._entry_size(key, vector)
+        while self.memory_bytes > self.max_memory_bytes and self._entries:
+            old_key, old_vector = self._entries.popitem(last=False)
+            self.memory_bytes -= self._entry_size(old_key, old_vector)
+
+    async def get_many(self, texts: Sequence[str], persistent: bool = False) -> List[Optional[List[float]]]:
+        """
+        Return the cached embedding for each text, or None where there is none
+
+        Args:
+            texts (Sequence[str]): Texts to look up
+            persistent (bool): Also look in the Postgres tier for texts that
+                are not in memory
+        """
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                results[i] = vector.tolist()
+                self.memory_hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing and persistent and self.persistent:
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = await db.execute(
+                        select(
+                            EmbeddingCacheEntry.key,
+                            EmbeddingCacheEntry.embedding,
+                            EmbeddingCacheEntry.last_used_at
+                        )
+                        .where(EmbeddingCacheEntry.key.in_(list(missing)))
+                    )
+                    stale_before = datetime.now(timezone.utc) - TOUCH_INTERVAL
+                    stale = []
+                    for key, embedding, last_used_at in rows.tuples():
+                        embedding = [float(x) for x in embedding]
+                        self._remember(key, embedding)
+                        for i in missing.pop(key):
+                            results[i] = embedding
+                            self.persistent_hits += 1
+                        if last_used_at < stale_before:
+                            stale.append(key)
+                    if stale:
+                        await db.execute(
+                            update(EmbeddingCacheEntry)
+                            .where(EmbeddingCacheEntry.key.in_(stale))
+                            .values(last_used_at=func.now())
+                            .execution_options(synchronize_session=False)
+                        )
+                        await db.commit()
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+
+        self.misses += sum(len(positions) for positions in missing.values())
+        return results
+
+    async def put_many(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        persistent: bool = False
+    ) -> None:
+        """
+        Store freshly computed embeddings in memory and, if asked, in Postgres
+
+        The rows are written with one INSERT, and about one call in
+        evict_every also trims the table in the same transaction.
+        """
+        rows = {}
+        for text, embedding in zip(texts, embeddings):
+            key = self.key(text)
+            self._remember(key, embedding)
+            rows[key] = embedding
+
+        if rows and persistent and self.persistent:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        insert(EmbeddingCacheEntry)
+                        .values([
+                            {"key": key, "model_name": self.model_name, "embedding": embedding}
+                            for key, embedding in rows.items()
+                        ])
+                        .on_conflict_do_nothing(index_elements=["key"])
+                    )
+                    if random.random() * self.evict_every < 1:
+                        await self.evict(db)
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    async def evict(self, db: AsyncSession) -> int:
+        """
+        Delete up to evict_batch of the least recently used rows beyond max_rows
+
+        Walks the last_used_at index instead of scanning the table. Runs in
+        the caller's transaction.
+
+        Returns:
+            int: Number of rows deleted
+        """
+        # Last use of the most recently used row that no longer fits
+        newest_evicted = (
+            select(EmbeddingCacheEntry.last_used_at)
+            .order_by(EmbeddingCacheEntry.last_used_at.desc())
+            .offset(self.max_rows)
+            .limit(1)
+            .scalar_subquery()
+        )
+        overflow = (
+            select(EmbeddingCacheEntry.key)
+            .where(EmbeddingCacheEntry.last_used_at <= newest_evicted)
+            .order_by(EmbeddingCacheEntry.last_used_at)
+            .limit(self.evict_batch)
+        )
+        result = await db.execute(
+            delete(EmbeddingCacheEntry)
+            .where(EmbeddingCacheEntry.key.in_(overflow))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            "memory_bytes": self.memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "persistent": self.persistent,
+            "max_rows": self.max_rows,
+        }
@@ -0,0 +1,207 @@
+from typing import Iterator, List, Optional, Set
+from dotenv import load_dotenv
+import asyncio
+import multiprocessing
+import os
+
+load_dotenv()
+
+# Characters read per step from plain text files
+TEXT_READ_SIZE = 64 * 1024
+# Processes extracting PDF page ranges and Word documents
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS") or "0") or os.cpu_count() or 1
+# Pages per task sent to an extraction process
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+# Shorter PDFs are extracted by a single process
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+# Seconds allowed for extracting one document
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "300"))
+# Longer PDFs are rejected; 0 disables the limit
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "2000"))
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Number of pages of a PDF; runs in an extraction process"""
+    import PyPDF2
+    with open(file_path, 'rb') as pdf_file:
+        return len(PyPDF2.PdfReader(pdf_file).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF; runs in an extraction process"""
+    import PyPDF2
+    with open(file_path, 'rb') as pdf_file:
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        return [
+            pdf_reader.pages[page_number].extract_text() or ""
+            for page_number in range(start, min(stop, len(pdf_reader.pages)))
+        ]
+
+
+def extract_docx_paragraphs(file_path: str) -> List[str]:
+    """Text of every paragraph of a Word document; runs in an extraction process"""
+    import docx
+    return [para.text for para in docx.Document(file_path).paragraphs]
+
+
+class ExtractionWorker:
+    def __init__(self, context):
+        """One spawned extraction process that can be killed on its own"""
+        self._pool = context.Pool(1)
+        # Tasks submitted and not yet finished; a worker with none can be reused
+        self.outstanding = 0
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        """Run fn(*args) in the process; the result resolves on the running loop"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.outstanding += 1
+
+        def resolve(set_outcome, outcome):
+            self.outstanding -= 1
+            if not future.done():
+                set_outcome(outcome)
+
+        def deliver(set_outcome, outcome):
+            # Runs on the pool's result thread, which must survive a closed loop
+            try:
+                loop.call_soon_threadsafe(resolve, set_outcome, outcome)
+            except RuntimeError:
+                pass
+
+        self._pool.apply_async(
+            fn, args,
+            callback=lambda result: deliver(future.set_result, result),
+            error_callback=lambda error: deliver(future.set_exception, error),
+        )
+        return future
+
+    def terminate(self) -> None:
+        """Kill the process, even if it is stuck on a pathological page"""
+        self._pool.terminate()
+
+
+class DocumentPool:
+    def __init__(self, workers: List[ExtractionWorker]):
+        """Extraction processes lent to one document, see ExtractionPool.open"""
+        self.workers = workers
+
+    @property
+    def processes(self) -> int:
+        return len(self.workers)
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        """Run fn(*args) on the least busy of the document's processes"""
+        return min(self.workers, key=lambda worker: worker.outstanding).submit(fn, *args)
+
+
+class ExtractionPool:
+    def __init__(self, max_workers: int = EXTRACTION_WORKERS):
+        """
+        Process slots for CPU-bound text extraction
+
+        PDF parsing in pure Python holds the GIL, so threads cannot extract
+        pages of one document in parallel, and a long document slows every
+        request in the process. Each document borrows its own processes, so
+        a document that runs out of time can be killed without failing tasks
+        of other uploads; at most max_workers processes exist at once across
+        documents. Processes that finish their document's tasks are kept
+        warm and lent to the next document, so only the first uploads pay
+        for starting an interpreter. Processes are spawned rather than
+        forked, so they do not inherit the app's threads or its loaded models.
+
+        Args:
+            max_workers (int): Number of extraction processes
+        """
+        self.max_workers = max_workers
+        self._context = multiprocessing.get_context("spawn")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[ExtractionWorker] = []
+        self._lent: Set[ExtractionWorker] = set()
+
+    async def open(self, num_tasks: int) -> DocumentPool:
+        """
+        Lend processes to one document's tasks
+
+        Waits for one free slot, then takes more while they are free, up to
+        num_tasks. Warm processes are reused before new ones are spawned.
+        Hand the result back with close().
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        await self._slots.acquire()
+        processes = 1
+        while processes < min(num_tasks, self.max_workers) and not self._slots.locked():
+            await self._slots.acquire()
+            processes += 1
+        workers = []
+        try:
+            for _ in range(processes):
+                workers.append(self._idle.pop() if self._idle else ExtractionWorker(self._context))
+        except BaseException:
+            self._idle.extend(workers)
+            for _ in range(processes):
+                self._slots.release()
+            raise
+        self._lent.update(workers)
+        return DocumentPool(workers)
+
+    async def close(self, document_pool: DocumentPool) -> None:
+        """Take a document's processes back, killing any still busy with its tasks"""
+        busy = [worker for worker in document_pool.workers if worker.outstanding]
+        loop = asyncio.get_running_loop()
+        # Joins the killed processes, so off the event loop; started before the
+        # first await, so a cancelled close still kills them all
+        terminations = [loop.run_in_executor(None, worker.terminate) for worker in busy]
+        try:
+            await asyncio.gather(*terminations)
+        finally:
+            for worker in document_pool.workers:
+                self._lent.discard(worker)
+                if worker not in busy:
+                    self._idle.append(worker)
+                self._slots.release()
+
+    def shutdown(self) -> None:
+        for worker in self._idle + list(self._lent):
+            worker.terminate()
+        self._idle.clear()
+        self._lent.clear()
+
+
+def iter_text_segments(file_path: str, file_ext: str) -> Iterator[str]:
+    """
+    Extract text from a stored upload incrementally
+
+    Plain text is read in fixed-size blocks, PDFs page by page and Word
+    documents paragraph by paragraph, so callers never need the whole text
+    in memory. Pages and paragraphs are separated by a single space.
+
+    Args:
+        file_path (str): Path of the stored file
+        file_ext (str): Lower-cased file extension, including the dot
+
+    Yields:
+        str: Consecutive pieces of the document text
+    """
+    if file_ext == ".txt":
+        with open(file_path, "r", encoding='utf-8') as f:
+            while True:
+                block = f.read(TEXT_READ_SIZE)
+                if not block:
+                    break
+                yield block
+    elif file_ext == ".pdf":
+        import PyPDF2
+        with open(file_path, 'rb') as pdf_file:
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            for page_number, page in enumerate(pdf_reader.pages):
+                page_text = page.extract_text() or ""
+                yield page_text if page_number == 0 else " " + page_text
+    elif file_ext in [".docx", ".doc"]:
+        import docx
+        doc = docx.Document(file_path)
+        for para_number, para in enumerate(doc.paragraphs):
+            yield para.text if para_number == 0 else " " + para.text
+
+extraction_pool = ExtractionPool()
@@ -0,0 +1,674 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import timedelta
+from fastapi import UploadFile
+from sqlalchemy import Integer, any_, bindparam, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from database import AsyncSessionLocal
+from models import Document, DocumentChunk, IngestionJob
+from services.answer_cache import AnswerCache
+from services.chunk_writer import ChunkRow, bulk_insert_chunks, content_hash
+from services.chunking import Chunk
+from services.embedding import embedding_service, EmbeddingQueueFull, PooledEmbedding
+from services.extraction import (
+    EXTRACTION_TIMEOUT,
+    MAX_PDF_PAGES,
+    PDF_PAGES_PER_TASK,
+    PDF_PARALLEL_MIN_PAGES,
+    count_pdf_pages,
+    extract_docx_paragraphs,
+    extract_pdf_pages,
+    extraction_pool,
+    iter_text_segments,
+)
+from services.metrics import StageTimer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", "100000000"))  # 100MB
+# Bytes copied per step from the request body to the uploads directory
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+# Chunks embedded and inserted together; bounds memory per upload
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Longer texts are only kept on disk and in chunks, not in documents.content
+DOCUMENT_CONTENT_MAX_CHARS = int(os.getenv("DOCUMENT_CONTENT_MAX_CHARS", "1000000"))
+# Documents processed at the same time by the background ingestion workers
+INGESTION_CONCURRENCY = int(os.getenv("INGESTION_CONCURRENCY", "2"))
+# A running job whose worker sent no heartbeat for this long is re-queued
+INGESTION_LEASE_TIMEOUT = float(os.getenv("INGESTION_LEASE_TIMEOUT", "120"))
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_SIZE"""
+
+
+class ExtractionError(Exception):
+    """Raised when text cannot be extracted from a stored upload"""
+
+
+@dataclass
+class IngestionResult:
+    num_chunks: int
+    total_document_length: int
+
+
+@dataclass
+class ReindexResult:
+    num_chunks: int
+    chunks_reused: int
+    chunks_embedded: int
+    chunks_removed: int
+    total_document_length: int
+
+
+@dataclass
+class IngestionProgress:
+    pages_extracted: int = 0
+    chunks_embedded: int = 0
+    rows_written: int = 0
+
+
+ProgressCallback = Callable[[IngestionProgress], Awaitable[None]]
+
+
+async def save_upload(file: UploadFile, file_path: str, max_size: int = MAX_UPLOAD_SIZE) -> int:
+    """
+    Copy an upload to disk in fixed-size pieces without blocking the event loop
+
+    Args:
+        file (UploadFile): Uploaded file
+        file_path (str): Destination path
+        max_size (int): Maximum number of bytes accepted
+
+    Returns:
+        int: Number of bytes written
+    """
+    size = 0
+    buffer = await run_in_threadpool(open, file_path, "wb")
+    try:
+        while True:
+            piece = await file.read(UPLOAD_READ_CHUNK_SIZE)
+            if not piece:
+                break
+            size += len(piece)
+            if size > max_size:
+                raise UploadTooLarge(f"File too large: more than {max_size} bytes")
+            await run_in_threadpool(buffer.write, piece)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    await run_in_threadpool(buffer.close)
+    return size
+
+
+async def _extracted_segments(file_path: str, file_ext: str) -> AsyncIterator[str]:
+    # Budget for the time spent waiting on extraction, not on the consumer
+    remaining = EXTRACTION_TIMEOUT
+
+    async def wait(awaitable):
+        nonlocal remaining
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=max(remaining, 0))
+        finally:
+            remaining -= time.perf_counter() - started
+
+    if file_ext == ".pdf":
+        # Even counting pages parses the file, so it runs in a killable process
+        pool = await wait(extraction_pool.open(1))
+        try:
+            num_pages = await wait(pool.submit(count_pdf_pages, file_path))
+        finally:
+            await extraction_pool.close(pool)
+        if MAX_PDF_PAGES and num_pages > MAX_PDF_PAGES:
+            raise ExtractionError(f"PDF has {num_pages} pages; at most {MAX_PDF_PAGES} are accepted")
+
+        ranges = [
+            (start, min(start + PDF_PAGES_PER_TASK, num_pages))
+            for start in range(0, num_pages, PDF_PAGES_PER_TASK)
+        ]
+        pool = await wait(extraction_pool.open(len(ranges) if num_pages >= PDF_PARALLEL_MIN_PAGES else 1))
+        # Extract ahead of the consumer, but hold at most a few ranges of text
+        window = pool.processes * 2
+        in_flight: Deque[asyncio.Future] = deque()
+        next_range = 0
+        page_number = 0
+        try:
+            while in_flight or next_range < len(ranges):
+                while next_range < len(ranges) and len(in_flight) < window:
+                    in_flight.append(pool.submit(extract_pdf_pages, file_path, *ranges[next_range]))
+                    next_range += 1
+                pages = await wait(in_flight.popleft())
+                for page_text in pages:
+                    yield page_text if page_number == 0 else " " + page_text
+                    page_number += 1
+        finally:
+            for future in in_flight:
+                future.cancel()
+            # Kills whatever is still running for this document, and nothing else
+            await extraction_pool.close(pool)
+
+    elif file_ext in (".docx", ".doc"):
+        pool = await wait(extraction_pool.open(1))
+        try:
+            paragraphs = await wait(pool.submit(extract_docx_paragraphs, file_path))
+        finally:
+            await extraction_pool.close(pool)
+        for para_number, paragraph in enumerate(paragraphs):
+            yield paragraph if para_number == 0 else " " + paragraph
+
+    else:
+        # Plain text: block reads that cannot spin, so a thread is enough
+        segments = iter_text_segments(file_path, file_ext)
+        while True:
+            segment = await wait(run_in_threadpool(next, segments, None))
+            if segment is None:
+                break
+            yield segment
+
+
+async def extract_text_segments(
+    file_path: str,
+    file_ext: str,
+    timer: Optional[StageTimer] = None
+) -> AsyncIterator[str]:
+    """
+    Extract a stored upload segment by segment without blocking the event loop
+
+    PDFs and Word documents are parsed only in extraction processes, which
+    are killed when the document runs out of time. PDFs are split into page
+    ranges, extracted in parallel once they have PDF_PARALLEL_MIN_PAGES
+    pages, and still yielded in order. Plain text is read in the threadpool.
+    Waiting for extraction may take at most EXTRACTION_TIMEOUT seconds per
+    document, and PDFs over MAX_PDF_PAGES pages are rejected.
+    """
+    try:
+        started = time.perf_counter()
+        async for segment in _extracted_segments(file_path, file_ext):
+            # Only the wait for the next segment, not the consumer's work
+            if timer is not None:
+                timer.add("upload_extraction", time.perf_counter() - started)
+            yield segment
+            started = time.perf_counter()
+    except ExtractionError:
+        raise
+    except asyncio.TimeoutError:
+        raise ExtractionError(f"Text extraction took longer than {EXTRACTION_TIMEOUT:g} seconds")
+    except Exception as e:
+        raise ExtractionError(str(e)) from e
+
+
+def chunk_meta_data(document: Document, chunk: Chunk, chunk_index: int) -> Dict[str, Any]:
+    return {
+        "source_file": document.title,
+        "chunk_index": chunk_index,
+        # Character offsets into the extracted document text
+        "start": chunk.start,
+        "end": chunk.end,
+        "num_tokens": chunk.num_tokens
+    }
+
+
+async def _store_chunk_batch(
+    db: AsyncSession,
+    document: Document,
+    chunks: List[Chunk],
+    chunk_indexes: Sequence[int],
+    timer: StageTimer
+) -> List[List[float]]:
+    with timer.time("upload_embedding"):
+        embeddings = await embedding_service.generate_batch_embeddings(
+            [chunk.text for chunk in chunks], persistent_cache=True
+        )
+    with timer.time("upload_insert"):
+        await bulk_insert_chunks(db, [
+            ChunkRow(
+                document_id=document.id,
+                text=chunk.text,
+                embedding=embedding,
+                meta_data=chunk_meta_data(document, chunk, chunk_index),
+                is_active=document.is_active
+            )
+            for chunk, chunk_index, embedding in zip(chunks, chunk_indexes, embeddings)
+        ])
+    return embeddings
+
+
+async def ingest_document(
+    db: AsyncSession,
+    document: Document,
+    file_path: str,
+    file_ext: str,
+    generate_embeddings: bool = True,
+    on_progress: Optional[ProgressCallback] = None
+) -> IngestionResult:
+    """
+    Extract, chunk, embed and insert a stored upload as a streaming pipeline
+
+    Text flows through extraction, chunking and embedding in batches of
+    INGEST_BATCH_SIZE chunks, so memory use does not grow with file size.
+    The caller owns the transaction and commits it.
+
+    Args:
+        db: Database session
+        document (Document): New document; it is added to the session and filled in
+        file_path (str): Path of the stored upload
+        file_ext (str): Lower-cased file extension, including the dot
+        generate_embeddings (bool): Whether to embed the document and its chunks
+        on_progress (optional): Awaited with the counters after every chunk batch
+
+    Returns:
+        IngestionResult: Number of chunks written and extracted text length
+    """
+    db.add(document)
+    await db.flush()  # Assigns document.id for the chunk rows
+
+    content_parts: Optional[List[str]] = []
+    content_length = 0
+
+    chunker = await embedding_service.run_tokenizer(embedding_service.chunker)
+    pending: List[Chunk] = []
+    num_chunks = 0
+    embed_chunks = generate_embeddings
+    progress = IngestionProgress()
+    # The document vector is pooled from the chunk vectors as they are written
+    pooled = PooledEmbedding()
+    # Per-stage totals for the whole document
+    timer = StageTimer()
+
+    async def flush_chunks(chunks: List[Chunk]) -> bool:
+        nonlocal num_chunks, pooled
+        try:
+            # A failed statement aborts the transaction; the savepoint confines
+            # that to this batch, so the document row and the cleanup survive
+            async with db.begin_nested():
+                embeddings = await _store_chunk_batch(
+                    db, document, chunks, range(num_chunks, num_chunks + len(chunks)), timer
+                )
+            pooled.add(embeddings, [len(chunk.text) for chunk in chunks])
+            num_chunks += len(chunks)
+        except EmbeddingQueueFull:
+            raise
+        except Exception as chunk_err:
+            # Keep the document, but without a partial set of chunks
+            logger.error(f"Document chunking error: {chunk_err}")
+            # Earlier batches were released into the outer transaction
+            await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document.id))
+            num_chunks = 0
+            pooled = PooledEmbedding()
+            return False
+
+        progress.chunks_embedded = progress.rows_written = num_chunks
+        if on_progress is not None:
+            await on_progress(progress)
+        return True
+
+    async for segment in extract_text_segments(file_path, file_ext, timer):
+        progress.pages_extracted += 1
+        content_length += len(segment)
+        if content_parts is not None:
+            if content_length <= DOCUMENT_CONTENT_MAX_CHARS:
+                content_parts.append(segment)
+            else:
+                content_parts = None
+
+        if embed_chunks:
+            with timer.time("upload_chunking"):
+                pending.extend(await embedding_service.run_tokenizer(chunker.feed, segment))
+            while embed_chunks and len(pending) >= INGEST_BATCH_SIZE:
+                batch, pending = pending[:INGEST_BATCH_SIZE], pending[INGEST_BATCH_SIZE:]
+                embed_chunks = await flush_chunks(batch)
+
+    if embed_chunks:
+        with timer.time("upload_chunking"):
+            pending.extend(await embedding_service.run_tokenizer(chunker.finish))
+        if pending:
+            await flush_chunks(pending)
+
+    document.content = "".join(content_parts) if content_parts is not None else None
+
+    # Document-level embedding covers the whole text without another forward pass
+    document.embedding = pooled.result()
+
+    await db.flush()
+    if document.is_active:
+        # Cached answers were built without this document; last, as it locks the version row
+        await AnswerCache.bump_version(db)
+    timer.observe()
+    if on_progress is not None:
+        await on_progress(progress)
+    return IngestionResult(num_chunks=num_chunks, total_document_length=content_length)
+
+
+async def reindex_document(
+    db: AsyncSession,
+    document: Document,
+    file_path: str,
+    file_ext: str
+) -> ReindexResult:
+    """
+    Replace the text of an existing document, embedding only the chunks that changed
+
+    The new text is chunked exactly as on upload and every chunk is matched by
+    content hash against the document's current chunks. Matching rows keep
+    their embeddings and only get their position metadata refreshed; new
+    chunks are embedded and inserted in batches of INGEST_BATCH_SIZE; rows
+    that match nothing are deleted. The caller owns the transaction and
+    commits it, so searches see either the old or the new version.
+
+    Args:
+        db: Database session
+        document (Document): Existing document, preferably locked FOR UPDATE
+        file_path (str): Path of the stored new version
+        file_ext (str): Lower-cased file extension, including the dot
+
+    Returns:
+        ReindexResult: Chunk counts by outcome and extracted text length
+    """
+    # Rows written before content_hash existed are hashed from their text
+    stored_hash = func.coalesce(
+        DocumentChunk.content_hash,
+        func.encode(func.sha256(func.convert_to(DocumentChunk.text, "UTF8")), "hex")
+    )
+    existing = await db.execute(
+        select(DocumentChunk.id, stored_hash, DocumentChunk.embedding, DocumentChunk.meta_data)
+        .where(DocumentChunk.document_id == document.id)
+        .order_by(DocumentChunk.id)
+    )
+    # Hash -> reusable rows with that text, in document order
+    reusable: Dict[str, List[Tuple[int, Any, Any]]] = {}
+    stale_ids: List[int] = []
+    for chunk_id, chunk_hash, embedding, meta_data in existing.tuples():
+        if embedding is None:
+            stale_ids.append(chunk_id)  # Uploaded without embeddings
+        else:
+            reusable.setdefault(chunk_hash, []).append((chunk_id, embedding, meta_data))
+
+    content_parts: Optional[List[str]] = []
+    content_length = 0
+
+    chunker = await embedding_service.run_tokenizer(embedding_service.chunker)
+    pending: List[Chunk] = []
+    num_chunks = 0
+    chunks_reused = 0
+    chunks_embedded = 0
+    pooled = PooledEmbedding()
+    timer = StageTimer()
+
+    async def flush_chunks(chunks: List[Chunk]) -> None:
+        nonlocal num_chunks, chunks_reused, chunks_embedded
+        new_chunks: List[Chunk] = []
+        new_indexes: List[int] = []
+        metadata_updates: List[Dict[str, Any]] = []
+        for chunk_index, chunk in enumerate(chunks, start=num_chunks):
+            matches = reusable.get(content_hash(chunk.text))
+            if not matches:
+                new_chunks.append(chunk)
+                new_indexes.append(chunk_index)
+                continue
+            chunk_id, embedding, old_meta_data = matches.pop(0)
+            pooled.add([embedding], [len(chunk.text)])
+            meta_data = chunk_meta_data(document, chunk, chunk_index)
+            # Only rewrite rows whose position actually moved
+            if old_meta_data != meta_data:
+                metadata_updates.append({"id": chunk_id, "meta_data": meta_data})
+        if metadata_updates:
+            with timer.time("upload_insert"):
+                await db.execute(update(DocumentChunk), metadata_updates)
+        if new_chunks:
+            embeddings = await _store_chunk_batch(db, document, new_chunks, new_indexes, timer)
+            pooled.add(embeddings, [len(chunk.text) for chunk in new_chunks])
+        num_chunks += len(chunks)
+        chunks_reused += len(chunks) - len(new_chunks)
+        chunks_embedded += len(new_chunks)
+
+    async for segment in extract_text_segments(file_path, file_ext, timer):
+        content_length += len(segment)
+        if content_parts is not None:
+            if content_length <= DOCUMENT_CONTENT_MAX_CHARS:
+                content_parts.append(segment)
+            else:
+                content_parts = None
+
+        with timer.time("upload_chunking"):
+            pending.extend(await embedding_service.run_tokenizer(chunker.feed, segment))
+        while len(pending) >= INGEST_BATCH_SIZE:
+            batch, pending = pending[:INGEST_BATCH_SIZE], pending[INGEST_BATCH_SIZE:]
+            await flush_chunks(batch)
+
+    with timer.time("upload_chunking"):
+        pending.extend(await embedding_service.run_tokenizer(chunker.finish))
+    if pending:
+        await flush_chunks(pending)
+
+    stale_ids.extend(chunk_id for rows in reusable.values() for chunk_id, _, _ in rows)
+    if stale_ids:
+        # One array parameter, however many rows go
+        await db.execute(
+            delete(DocumentChunk)
+            .where(DocumentChunk.id == any_(bindparam("stale_ids", stale_ids, type_=ARRAY(Integer))))
+        )
+
+    document.content = "".join(content_parts) if content_parts is not None else None
+    document.file_path = file_path
+    document.embedding = pooled.result()
+
+    await db.flush()
+    timer.observe()
+    return ReindexResult(
+        num_chunks=num_chunks,
+        chunks_reused=chunks_reused,
+        chunks_embedded=chunks_embedded,
+        chunks_removed=len(stale_ids),
+        total_document_length=content_length
+    )
+
+
+class IngestionWorkerPool:
+    def __init__(
+        self,
+        concurrency: int = INGESTION_CONCURRENCY,
+        lease_timeout: float = INGESTION_LEASE_TIMEOUT
+    ):
+        """
+        Background workers that ingest uploads recorded as IngestionJob rows
+
+        Jobs are claimed with a conditional UPDATE, so several application
+        processes can share the ingestion_jobs table without double work. A
+        claim is a lease: the worker stores its own token on the job and
+        refreshes heartbeat_at while it runs, and a job whose heartbeat is
+        older than lease_timeout is re-queued, at startup and periodically.
+        The document and the "completed" status are committed together, and
+        only while the lease is still held, so a job is never ingested twice.
+
+        Args:
+            concurrency (int): Number of documents ingested at the same time
+            lease_timeout (float): Seconds without a heartbeat after which a
+                running job counts as abandoned
+        """
+        self.concurrency = concurrency
+        self.lease_timeout = lease_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._workers.append(asyncio.create_task(self._reclaimer(), name="ingestion-reclaimer"))
+
+        await self.reclaim_expired()
+        async with AsyncSessionLocal() as db:
+            # Pick up jobs that were queued before a restart
+            result = await db.execute(
+                select(IngestionJob.id)
+                .where(IngestionJob.status == "queued")
+                .order_by(IngestionJob.created_at)
+            )
+            for job_id in result.scalars():
+                self._queue.put_nowait(job_id)
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job_id: str) -> None:
+        """Queue a committed IngestionJob for processing"""
+        self._queue.put_nowait(job_id)
+
+    async def reclaim_expired(self) -> None:
+        """Re-queue running jobs whose worker stopped sending heartbeats onto this pool"""
+        async with AsyncSessionLocal() as db:
+            # A killed process left its jobs "running" without a fresh heartbeat
+            reclaimed = await db.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.status == "running",
+                    or_(
+                        IngestionJob.heartbeat_at.is_(None),
+                        IngestionJob.heartbeat_at < func.now() - timedelta(seconds=self.lease_timeout)
+                    )
+                )
+                .values(status="queued", started_at=None, lease_owner=None, heartbeat_at=None)
+                .returning(IngestionJob.id)
+            )
+            job_ids = reclaimed.scalars().all()
+            await db.commit()
+        if job_ids:
+            logger.warning(f"Re-queued {len(job_ids)} ingestion jobs whose worker stopped responding")
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+
+    async def _reclaimer(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout)
+            try:
+                await self.reclaim_expired()
+            except Exception as e:
+                logger.error(f"Reclaiming ingestion jobs failed: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    async def _update_job(job_id: str, lease: str, **values) -> bool:
+        """Update a job this worker still holds; returns False once the lease is lost"""
+        # Separate short transaction so progress is visible before the ingest commits
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.lease_owner == lease)
+                .values(**values)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def _heartbeat(self, job_id: str, lease: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_timeout / 4)
+            try:
+                if not await self._update_job(job_id, lease, heartbeat_at=func.now()):
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat of ingestion job {job_id} failed: {e}")
+
+    async def _release(self, job_id: str, lease: str) -> None:
+        """Hand a claimed job back to the queue as if it had never started"""
+        await self._update_job(
+            job_id, lease, status="queued", started_at=None, lease_owner=None, heartbeat_at=None
+        )
+
+    async def _process(self, job_id: str) -> None:
+        lease = str(uuid.uuid4())
+        async with AsyncSessionLocal() as db:
+            claimed = await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.status == "queued")
+                .values(status="running", started_at=func.now(), lease_owner=lease, heartbeat_at=func.now())
+                .returning(IngestionJob)
+            )
+            job = claimed.scalar_one_or_none()
+            await db.commit()
+            if job is None:
+                return  # Already taken by another worker
+
+            document = Document(
+                title=job.filename,
+                file_path=job.file_path,
+                is_active=True
+            )
+
+            async def report(progress: IngestionProgress) -> None:
+                await self._update_job(job_id, lease, **asdict(progress))
+
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, lease))
+            try:
+                await ingest_document(
+                    db,
+                    document,
+                    job.file_path,
+                    os.path.splitext(job.filename)[1].lower(),
+                    generate_embeddings=job.generate_embeddings,
+                    on_progress=report
+                )
+                heartbeat.cancel()
+                # Same transaction as the document, so a crash cannot leave the
+                # document without a completed job, or the job "running" after it
+                completed = await db.execute(
+                    update(IngestionJob)
+                    .where(IngestionJob.id == job_id, IngestionJob.lease_owner == lease)
+                    .values(status="completed", document_id=document.id, finished_at=func.now())
+                )
+                if completed.rowcount == 0:
+                    await db.rollback()
+                    logger.warning(f"Ingestion job {job_id} was reclaimed by another worker; discarding")
+                    return
+                await db.commit()
+            except EmbeddingQueueFull:
+                # Embedding backend is saturated by interactive traffic; retry later
+                await db.rollback()
+                await self._release(job_id, lease)
+                await asyncio.sleep(1)
+                self.submit(job_id)
+                return
+            except asyncio.CancelledError:
+                # Shutting down: hand the job back so the next start() picks it up
+                await db.rollback()
+                await self._release(job_id, lease)
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Ingestion job {job_id} failed: {e}")
+                await self._update_job(job_id, lease, status="failed", error=str(e), finished_at=func.now())
+                return
+            finally:
+                heartbeat.cancel()
+
+        logger.info(f"Ingestion job {job_id} completed: {job.filename}")
+
+ingestion_pool = IngestionWorkerPool()
@@ -0,0 +1,109 @@
+from typing import AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+import os
+import time
+
+from services.metrics import observe, timed
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+# Point at a local fake server for tests and benchmarks, e.g. http://localhost:9000
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+class LLMClient:
+    def __init__(
+        self,
+        model: str = LLM_MODEL,
+        base_url: Optional[str] = LLM_BASE_URL,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        timeout: float = LLM_TIMEOUT,
+    ):
+        """
+        Async chat completion client with a pooled HTTP connection
+
+        Wraps groq.AsyncGroq over a shared httpx.AsyncClient, so concurrent
+        answers reuse keep-alive connections and never block the event loop.
+
+        Args:
+            model (str): Chat model name
+            base_url (str, optional): API base URL; defaults to Groq's
+            max_connections (int): Maximum concurrent connections to the API
+            timeout (float): Request timeout in seconds
+        """
+        self.model = model
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use, inside the serving process and its event loop
+        if self._client is None:
+            import httpx
+            from groq import AsyncGroq
+
+            self._client = AsyncGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                    timeout=self.timeout,
+                ),
+            )
+        return self._client
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 1024
+    ) -> str:
+        """Return the full completion for a chat"""
+        with timed("llm_total"):
+            chat_completion = await self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        return chat_completion.choices[0].message.content
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 1024
+    ) -> AsyncIterator[str]:
+        """Yield completion tokens as the API produces them"""
+        started = time.perf_counter()
+        first_token = True
+        response = await self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token:
+                    observe("llm_first_token", time.perf_counter() - started)
+                    first_token = False
+                yield chunk.choices[0].delta.content
+        observe("llm_total", time.perf_counter() - started)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+llm_client = LLMClient()
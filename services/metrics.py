@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from dotenv import load_dotenv
+import json
+import logging
+import os
+import random
+import time
+import uuid
+
+from prometheus_client import CollectorRegistry, Histogram, generate_latest, multiprocess
+
+load_dotenv()
+
+logger = logging.getLogger("rag.trace")
+
+# Fraction of requests whose per-stage timings are logged as one JSON line;
+# requests with a sampled W3C traceparent header are always traced
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Log retrieved context, prompts and answers in full; for local debugging only
+LOG_PAYLOADS = os.getenv("LOG_PAYLOADS", "false").lower() == "true"
+
+# From 1 ms (SQL, cache hits) to 2 minutes (large uploads, slow LLM answers)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_seconds",
+    "Time spent in one stage of answering a query or ingesting an upload",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "rag_http_request_seconds",
+    "HTTP request latency until the response headers are sent",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        """Per-request record of stage timings, kept only for sampled requests"""
+        self.trace_id = trace_id
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and the current trace, if any"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+class StageTimer:
+    def __init__(self):
+        """Adds up stage durations over a multi-step operation and observes each total once"""
+        self.seconds: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def observe(self) -> None:
+        for stage, seconds in self.seconds.items():
+            observe(stage, seconds)
+
+
+def start_trace(traceparent: Optional[str] = None) -> Optional[Trace]:
+    """Start tracing the current request if it is sampled; returns the trace or None"""
+    trace_id = None
+    sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if traceparent:
+        # version-traceid-parentid-flags
+        parts = traceparent.strip().split("-")
+        if len(parts) == 4 and len(parts[1]) == 32:
+            trace_id = parts[1]
+            try:
+                sampled = sampled or bool(int(parts[3], 16) & 1)
+            except ValueError:
+                pass
+    if not sampled:
+        return None
+    trace = Trace(trace_id or uuid.uuid4().hex)
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace, method: str, route: str, status: int, seconds: float) -> None:
+    logger.info(json.dumps({
+        "trace_id": trace.trace_id,
+        "method": method,
+        "route": route,
+        "status": status,
+        "total_ms": round(seconds * 1000, 3),
+        "stages_ms": {stage: round(value * 1000, 3) for stage, value in trace.stages.items()},
+    }))
+
+
+def render_metrics() -> bytes:
+    """Prometheus text format; aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RERANKER_MODEL_NAME = os.getenv("RERANKER_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Re-rank by default when a request does not say
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+# Candidates fetched from the retriever and scored by the cross-encoder
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+# Per-request budget; past it the retriever's order is used instead
+RERANK_TIMEOUT_MS = float(os.getenv("RERANK_TIMEOUT_MS", "300"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "1"))
+# Most candidates scored per request; the rest keep their retrieval order after them
+RERANK_MAX_PAIRS = int(os.getenv("RERANK_MAX_PAIRS", "64"))
+
+
+class Reranker:
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL_NAME,
+        candidates: int = RERANK_CANDIDATES,
+        timeout_ms: float = RERANK_TIMEOUT_MS,
+        batch_size: int = RERANK_BATCH_SIZE,
+        max_length: int = RERANK_MAX_LENGTH,
+        max_workers: int = RERANK_WORKERS,
+        max_pairs: int = RERANK_MAX_PAIRS,
+    ):
+        """
+        Cross-encoder re-ranking of retrieved chunks on CPU
+
+        Scores (question, chunk) pairs jointly, which ranks far better than
+        comparing two independently computed embeddings. Inference runs in
+        batches on a dedicated thread pool so it never blocks the event loop
+        or queues behind embedding jobs. A request that does not get its
+        scores within the budget keeps the retriever's order. An abandoned
+        call cannot be stopped, so while every worker is still busy, requests
+        skip re-ranking at once instead of queueing behind it.
+
+        Args:
+            model_name (str): sentence-transformers CrossEncoder model
+            candidates (int): Default number of candidates to re-rank
+            timeout_ms (float): Per-request latency budget in milliseconds
+            batch_size (int): Pairs per forward pass
+            max_length (int): Token limit per pair; longer pairs are truncated
+            max_workers (int): Inference threads; torch already spreads one
+                forward pass over all cores
+            max_pairs (int): Most (question, chunk) pairs scored per request
+        """
+        self.model_name = model_name
+        self.candidates = candidates
+        self.timeout = timeout_ms / 1000
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_workers = max_workers
+        self.max_pairs = max_pairs
+
+        self._model = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Timed-out scoring calls whose thread is still busy
+        self._abandoned = 0
+
+        # Counters
+        self.reranked = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.skipped_busy = 0
+        self.pairs_scored = 0
+        self.inference_seconds = 0.0
+
+    @property
+    def model(self):
+        # Loaded on first use; the import pulls in torch
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="rerank",
+            )
+        return self._executor
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Relevance of each text to the query; blocking"""
+        started = time.perf_counter()
+        scores = self.model.predict(
+            [(query, text) for text in texts],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+        self.inference_seconds += time.perf_counter() - started
+        self.pairs_scored += len(texts)
+        return [float(score) for score in scores]
+
+    async def warm_up(self) -> None:
+        """Load the model off the event loop so the first request does not pay for it"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), self.score, "warm up", ["warm up"])
+
+    async def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        top_k: int,
+        timeout_ms: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Reorder retrieval results by cross-encoder score and keep the best top_k
+
+        Args:
+            query (str): Search query
+            results (List[Dict]): Retriever results, best first
+            top_k (int): Number of results to keep
+            timeout_ms (float, optional): Override of the latency budget
+
+        Returns:
+            Tuple[List[Dict], bool]: The kept results (with rerank_score when
+            re-ranked) and whether re-ranking finished within the budget
+        """
+        if len(results) <= 1:
+            return results[:top_k], False
+        if self._abandoned >= self.max_workers:
+            # Timed-out calls still hold every worker; do not queue behind them
+            self.skipped_busy += 1
+            return results[:top_k], False
+
+        timeout = self.timeout if timeout_ms is None else timeout_ms / 1000
+        candidates, unscored = results[:self.max_pairs], results[self.max_pairs:]
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(
+            self.score,
+            query,
+            [result['chunk_text'] for result in candidates]
+        )
+        try:
+            scores = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._abandoned += 1
+                # Runs on the loop once the thread finishes the call
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._abandoned_job_done))
+            self.timeouts += 1
+            logger.warning(f"Re-ranking exceeded {timeout * 1000:.0f} ms, keeping retrieval order")
+            return results[:top_k], False
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Re-ranking failed, keeping retrieval order: {e}")
+            return results[:top_k], False
+
+        self.reranked += 1
+        ranked = sorted(zip(scores, candidates), key=lambda pair: pair[0], reverse=True)
+        reranked = [{**result, 'rerank_score': score} for score, result in ranked]
+        return (reranked + unscored)[:top_k], True
+
+    def _abandoned_job_done(self) -> None:
+        self._abandoned -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "loaded": self.loaded,
+            "reranked": self.reranked,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "skipped_busy": self.skipped_busy,
+            "abandoned_jobs": self._abandoned,
+            "pairs_scored": self.pairs_scored,
+            "pairs_per_second": (
+                self.pairs_scored / self.inference_seconds if self.inference_seconds else 0.0
+            ),
+            "timeout_ms": self.timeout * 1000,
+        }
+
+reranker = Reranker()
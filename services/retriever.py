@@ -1,69 +1,480 @@
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
+from sqlalchemy import Text, bindparam, cast, func, literal, literal_column, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from services.embedding import embedding_service
+from pgvector.sqlalchemy import Vector
+from models import DocumentChunk, Document, EMBEDDING_DIMENSIONS, VECTOR_INDEX_TYPE, VECTOR_STORAGE_MODE, quantize_embedding
+from services.embedding import embedding_service, EmbeddingQueueFull
+from services.batcher import query_batcher
+from services.reranker import reranker, RERANK_ENABLED
+from services.metrics import timed
+from dotenv import load_dotenv
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "semantic" (vector only) or "hybrid" (vector + full-text, rank-fused)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "semantic")
+# Candidates taken from each ranking before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+# Reciprocal rank fusion constant; larger values flatten the rank curve
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Must match the configuration of the generated DocumentChunk.text_search column
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+# With quantized storage, candidates fetched from the compact index and
+# re-scored against the float32 vectors
+QUANTIZED_CANDIDATES = int(os.getenv("QUANTIZED_CANDIDATES", "40"))
+# pgvector's default hnsw.ef_search; an HNSW scan returns at most this many rows
+HNSW_DEFAULT_EF_SEARCH = 40
+# Largest hnsw.ef_search pgvector accepts
+HNSW_MAX_EF_SEARCH = 1000
+
+# Distance the ANN index orders by, per VECTOR_STORAGE_MODE; must match the
+# expressions of the indexes in models.py
+BATCH_SEARCH_ORDER = {
+    "full": "c.embedding <#> queries.embedding",
+    "halfvec": (
+        f"CAST(c.embedding AS halfvec({EMBEDDING_DIMENSIONS})) "
+        f"<#> CAST(queries.embedding AS halfvec({EMBEDDING_DIMENSIONS}))"
+    ),
+    "binary": (
+        f"CAST(binary_quantize(c.embedding) AS bit({EMBEDDING_DIMENSIONS})) "
+        f"<~> CAST(binary_quantize(queries.embedding) AS bit({EMBEDDING_DIMENSIONS}))"
+    ),
+}
+
+
+def build_batch_search_sql(storage_mode: str = VECTOR_STORAGE_MODE):
+    """
+    One nearest-neighbour search per query vector in a single statement
+
+    The inner LATERAL subquery only touches document_chunks, so each search
+    stays an ordered scan of the partial ANN index; it fetches :candidates
+    rows, which the outer level re-scores with the float32 inner product.
+    """
+    return text(f"""
+WITH queries AS (
+    SELECT ordinality - 1 AS query_index, CAST(vector_text AS vector) AS embedding
+    FROM unnest(CAST(:embeddings AS text[])) WITH ORDINALITY AS q(vector_text, ordinality)
+)
+SELECT queries.query_index, hit.text, d.title, d.id, d.file_path, hit.similarity_score
+FROM queries
+CROSS JOIN LATERAL (
+    SELECT candidate.document_id, candidate.text,
+           -(candidate.embedding <#> queries.embedding) AS similarity_score
+    FROM (
+        SELECT c.document_id, c.text, c.embedding
+        FROM document_chunks c
+        WHERE c.is_active
+        ORDER BY {BATCH_SEARCH_ORDER[storage_mode]}
+        LIMIT :candidates
+    ) candidate
+    WHERE CAST(:min_similarity_score AS float8) IS NULL
+       OR (candidate.embedding <#> queries.embedding) <= -CAST(:min_similarity_score AS float8)
+    ORDER BY candidate.embedding <#> queries.embedding
+    LIMIT :top_k
+) hit
+JOIN documents d ON d.id = hit.document_id
+ORDER BY queries.query_index, hit.similarity_score DESC
+""").bindparams(bindparam("embeddings", type_=ARRAY(Text)))
+
+BATCH_SEARCH_SQL = build_batch_search_sql()
+
+
+def candidate_count(top_k: int) -> int:
+    """Rows to take from the ANN index to end up with top_k results"""
+    if VECTOR_STORAGE_MODE == "full":
+        return top_k
+    return max(top_k, QUANTIZED_CANDIDATES)
 
 class Retriever:
-    def __init__(self, embedding_service):
+    def __init__(self, embedding_service, query_batcher=None, reranker=None):
         """
         Initialize a vector store retriever
         
         Args:
             embedding_service: Embedding generation service
+            query_batcher (optional): Micro-batcher used to embed queries
+            reranker (optional): Cross-encoder used to re-rank results
         """
         self.embedding_service = embedding_service
+        self.query_batcher = query_batcher
+        self.reranker = reranker
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, batching it with concurrent queries when possible"""
+        with timed("query_embedding"):
+            if self.query_batcher is not None:
+                return await self.query_batcher.embed(query)
+            return await self.embedding_service.generate_embeddings(query)
+
+    @staticmethod
+    async def _set_index_params(
+        db: AsyncSession,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        limit: int = 0
+    ) -> None:
+        """Apply per-query ANN search settings for the current transaction only"""
+        # An HNSW scan cannot return more rows than ef_search
+        if ef_search is None and VECTOR_INDEX_TYPE == "hnsw" and limit > HNSW_DEFAULT_EF_SEARCH:
+            ef_search = min(limit, HNSW_MAX_EF_SEARCH)
+        # SET does not accept bind parameters, hence the int() coercion
+        if ef_search is not None:
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if probes is not None:
+            await db.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+
+    @staticmethod
+    def _nearest_chunks(query_embedding: List[float], limit: int):
+        """
+        Subquery of the active chunks nearest to the query by the ANN index
+
+        With full storage this is the exact ordering. With quantized storage
+        the order is approximate and the caller re-scores the rows with the
+        float32 embedding column, which the subquery includes.
+        """
+        if VECTOR_STORAGE_MODE == "full":
+            order = DocumentChunk.embedding.max_inner_product(query_embedding)
+        else:
+            indexed = quantize_embedding(DocumentChunk.embedding)
+            # Explicit cast: binary_quantize() is overloaded and cannot infer a parameter type
+            query_vector = quantize_embedding(
+                cast(literal(query_embedding, Vector(EMBEDDING_DIMENSIONS)), Vector(EMBEDDING_DIMENSIONS))
+            )
+            if VECTOR_STORAGE_MODE == "binary":
+                order = indexed.hamming_distance(query_vector)
+            else:
+                order = indexed.max_inner_product(query_vector)
+        return (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.document_id,
+                DocumentChunk.text,
+                DocumentChunk.embedding
+            )
+            # Bare column predicate so the partial ANN index matches
+            .where(DocumentChunk.is_active)
+            .order_by(order)
+            .limit(limit)
+        ).subquery('nearest_chunks')
 
     async def semantic_search(
         self, 
         query: str, 
         db: AsyncSession,
         top_k: int = 3,
-        min_similarity_score: float = None
+        min_similarity_score: float = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Perform semantic search 
+        Perform semantic search over chunks of active documents
         
         Args:
             query (str): Search query
             db: Database session
             top_k (int): Number of top results to retrieve
-            min_similarity_score (float, optional): Minimum similarity threshold
+            min_similarity_score (float, optional): Minimum cosine similarity, applied in SQL
+            ef_search (int, optional): HNSW candidate list size; higher means better
+                recall and slower queries. Should be at least top_k.
+            probes (int, optional): Number of IVFFlat lists to scan
+            query_embedding (List[float], optional): Precomputed embedding of the query
         
         Returns:
-            List of semantic search results
+            List of semantic search results, most similar first
         """
         try:
             # Generate query embedding
-            query_embedding = await self.embedding_service.generate_embeddings(query)
+            if query_embedding is None:
+                query_embedding = await self.embed_query(query)
+            
+            candidates = candidate_count(top_k)
+            await self._set_index_params(db, ef_search=ef_search, probes=probes, limit=candidates)
             
-            # Perform similarity search using the previous method
             query_results = []
             
-            # Query document chunks
-            from sqlalchemy import select
-            from models import DocumentChunk, Document
+            # Embeddings are unit length, so the negative inner product (<#>)
+            # orders exactly like cosine distance and matches vector_ip_ops.
+            # Always computed on the float32 vectors, which re-scores
+            # quantized candidates.
+            nearest = self._nearest_chunks(query_embedding, candidates)
+            distance = nearest.c.embedding.max_inner_product(query_embedding)
+            similarity = (-distance).label('similarity_score')
             
-            # Construct query to find chunks ordered by embedding similarity
-            chunk_query = select(DocumentChunk, Document).join(Document).order_by(
-                DocumentChunk.embedding.l2_distance(query_embedding)
-            ).limit(top_k)
+            # Only return the columns the response needs, never the vectors
+            chunk_query = (
+                select(
+                    nearest.c.text,
+                    Document.title,
+                    Document.id,
+                    Document.file_path,
+                    similarity
+                )
+                .join(Document, nearest.c.document_id == Document.id)
+                .order_by(distance)
+                .limit(top_k)
+            )
+            if min_similarity_score is not None:
+                chunk_query = chunk_query.where(distance <= -min_similarity_score)
             
             # Execute the query
-            result = await db.execute(chunk_query)
+            with timed("sql_search"):
+                result = await db.execute(chunk_query)
             
             # Process results
-            for chunk, document in result.tuples():
+            for chunk_text, title, document_id, file_path, score in result.tuples():
                 query_results.append({
-                    'chunk_text': chunk.text,
-                    'document_title': document.title,
-                    'document_id': document.id,
-                    'file_path': document.file_path
+                    'chunk_text': chunk_text,
+                    'document_title': title,
+                    'document_id': document_id,
+                    'file_path': file_path,
+                    'similarity_score': score
                 })
             
             return query_results
         
-        except Exception as e:
-            print(f"Semantic search error: {e}")
+        except EmbeddingQueueFull:
+            raise
+        except Exception:
+            logger.exception("Semantic search failed")
+            # Leave the session usable for callers that handle the error
+            await db.rollback()
+            raise
+
+    async def batch_semantic_search(
+        self,
+        queries: List[str],
+        db: AsyncSession,
+        top_k: int = 3,
+        min_similarity_score: float = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Semantic search for many queries at once
+        
+        All queries are embedded in one batched forward pass and searched in
+        one SQL statement, a LATERAL join over the array of query vectors, so
+        the cost per query is a fraction of separate semantic_search calls.
+        
+        Args:
+            queries (List[str]): Search queries
+            db: Database session
+            top_k (int): Number of results per query
+            min_similarity_score (float, optional): Minimum cosine similarity
+            ef_search (int, optional): HNSW candidate list size
+            probes (int, optional): Number of IVFFlat lists to scan
+        
+        Returns:
+            One list of results per query, in query order, most similar first
+        """
+        if not queries:
             return []
+        
+        with timed("query_embedding"):
+            query_embeddings = await self.embedding_service.generate_batch_embeddings(queries)
+        
+        candidates = candidate_count(top_k)
+        await self._set_index_params(db, ef_search=ef_search, probes=probes, limit=candidates)
+        with timed("sql_search"):
+            result = await db.execute(BATCH_SEARCH_SQL, {
+                "embeddings": [
+                    "[" + ",".join(str(float(x)) for x in embedding) + "]"
+                    for embedding in query_embeddings
+                ],
+                "min_similarity_score": min_similarity_score,
+                "candidates": candidates,
+                "top_k": top_k,
+            })
+        
+        query_results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for query_index, chunk_text, title, document_id, file_path, score in result.tuples():
+            query_results[query_index].append({
+                'chunk_text': chunk_text,
+                'document_title': title,
+                'document_id': document_id,
+                'file_path': file_path,
+                'similarity_score': score
+            })
+        return query_results
+
+    async def hybrid_search(
+        self,
+        query: str,
+        db: AsyncSession,
+        top_k: int = 3,
+        min_similarity_score: float = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None,
+        candidates: int = HYBRID_CANDIDATES
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse vector and full-text rankings over chunks of active documents
+        
+        Both rankings and their reciprocal rank fusion run as one SQL
+        statement: the nearest `candidates` chunks by embedding and the best
+        `candidates` chunks by ts_rank_cd are merged with a full outer join
+        and scored sum(1 / (RRF_K + rank)), so chunks found by both come first
+        and exact terms (identifiers, error codes, names) the embedding misses
+        still surface.
+        
+        Args:
+            query (str): Search query
+            db: Database session
+            top_k (int): Number of fused results to return
+            min_similarity_score (float, optional): Minimum cosine similarity for
+                vector candidates; lexical matches are kept regardless
+            ef_search (int, optional): HNSW candidate list size
+            probes (int, optional): Number of IVFFlat lists to scan
+            query_embedding (List[float], optional): Precomputed embedding of the query
+            candidates (int): Depth of each ranking before fusion
+        
+        Returns:
+            List of results, best fused rank first. similarity_score is None
+            for chunks found only by the full-text ranking.
+        """
+        try:
+            if query_embedding is None:
+                query_embedding = await self.embed_query(query)
+            
+            candidates = max(candidates, top_k)
+            await self._set_index_params(
+                db, ef_search=ef_search, probes=probes, limit=candidate_count(candidates)
+            )
+            
+            # Vector ranking, served by the partial ANN index
+            nearest = self._nearest_chunks(query_embedding, candidate_count(candidates))
+            distance = nearest.c.embedding.max_inner_product(query_embedding)
+            vector_query = (
+                select(nearest.c.id.label('chunk_id'), distance.label('distance'))
+                .order_by(distance)
+                .limit(candidates)
+            )
+            if min_similarity_score is not None:
+                vector_query = vector_query.where(distance <= -min_similarity_score)
+            vector_candidates = vector_query.subquery('vector_candidates')
+            vector_hits = select(
+                vector_candidates.c.chunk_id,
+                (-vector_candidates.c.distance).label('similarity_score'),
+                func.row_number().over(order_by=vector_candidates.c.distance).label('rank')
+            ).cte('vector_hits')
+            
+            # Lexical ranking, served by the partial GIN index
+            ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+            lexical_score = func.ts_rank_cd(DocumentChunk.text_search, ts_query)
+            lexical_candidates = (
+                select(DocumentChunk.id.label('chunk_id'), lexical_score.label('lexical_score'))
+                .where(DocumentChunk.is_active)
+                .where(DocumentChunk.text_search.bool_op('@@')(ts_query))
+                .order_by(lexical_score.desc())
+                .limit(candidates)
+            ).subquery('lexical_candidates')
+            lexical_hits = select(
+                lexical_candidates.c.chunk_id,
+                func.row_number().over(order_by=lexical_candidates.c.lexical_score.desc()).label('rank')
+            ).cte('lexical_hits')
+            
+            # Reciprocal rank fusion
+            fusion_score = (
+                func.coalesce(1.0 / (RRF_K + vector_hits.c.rank), 0.0)
+                + func.coalesce(1.0 / (RRF_K + lexical_hits.c.rank), 0.0)
+            ).label('fusion_score')
+            fused = (
+                select(
+                    func.coalesce(vector_hits.c.chunk_id, lexical_hits.c.chunk_id).label('chunk_id'),
+                    vector_hits.c.similarity_score,
+                    fusion_score
+                )
+                .select_from(vector_hits.join(
+                    lexical_hits,
+                    vector_hits.c.chunk_id == lexical_hits.c.chunk_id,
+                    full=True
+                ))
+                .order_by(fusion_score.desc())
+                .limit(top_k)
+            ).cte('fused')
+            
+            chunk_query = (
+                select(
+                    DocumentChunk.text,
+                    Document.title,
+                    Document.id,
+                    Document.file_path,
+                    fused.c.similarity_score,
+                    fused.c.fusion_score
+                )
+                .select_from(fused)
+                .join(DocumentChunk, DocumentChunk.id == fused.c.chunk_id)
+                .join(Document, DocumentChunk.document_id == Document.id)
+                .order_by(fused.c.fusion_score.desc())
+            )
+            
+            with timed("sql_search"):
+                result = await db.execute(chunk_query)
+            
+            return [
+                {
+                    'chunk_text': chunk_text,
+                    'document_title': title,
+                    'document_id': document_id,
+                    'file_path': file_path,
+                    'similarity_score': similarity_score,
+                    'fusion_score': float(score)
+                }
+                for chunk_text, title, document_id, file_path, similarity_score, score in result.tuples()
+            ]
+        
+        except EmbeddingQueueFull:
+            raise
+        except Exception:
+            logger.exception("Hybrid search failed")
+            # Leave the session usable for callers that handle the error
+            await db.rollback()
+            raise
+
+    async def search(
+        self,
+        query: str,
+        db: AsyncSession,
+        search_mode: Optional[str] = None,
+        top_k: int = 3,
+        rerank: Optional[bool] = None,
+        rerank_candidates: Optional[int] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Run semantic_search or hybrid_search, optionally followed by re-ranking
+        
+        Args:
+            query (str): Search query
+            db: Database session
+            search_mode (str, optional): "semantic" or "hybrid"; defaults to RETRIEVAL_MODE
+            top_k (int): Number of results to return
+            rerank (bool, optional): Over-fetch and re-rank with the cross-encoder;
+                defaults to RERANK_ENABLED
+            rerank_candidates (int, optional): Number of candidates to re-rank
+            **kwargs: Passed through to the search method
+        
+        Returns:
+            List of results, best first
+        """
+        search_fn = self.hybrid_search if (search_mode or RETRIEVAL_MODE) == "hybrid" else self.semantic_search
+        if rerank is None:
+            rerank = RERANK_ENABLED
+        if not rerank or self.reranker is None:
+            return await search_fn(query, db, top_k=top_k, **kwargs)
+        
+        candidates = max(rerank_candidates or self.reranker.candidates, top_k)
+        results = await search_fn(query, db, top_k=candidates, **kwargs)
+        with timed("rerank"):
+            results, _ = await self.reranker.rerank(query, results, top_k)
+        return results
 
 # Create retriever with embedding service
-retriever = Retriever(embedding_service=embedding_service)
+retriever = Retriever(embedding_service=embedding_service, query_batcher=query_batcher, reranker=reranker)
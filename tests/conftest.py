@@ -0,0 +1,43 @@
+"""
+Shared test setup
+
+Unit tests need no running services; they skip when a package required by
+the app modules they import is not installed. Tests that touch Postgres run
+only when TEST_DATABASE_URL points at a scratch database with pgvector and
+`alembic upgrade head` applied; it is exported as DATABASE_URL before any
+app module creates its engine.
+"""
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+TOKEN = re.compile(r"\S+")
+
+
+class WhitespaceTokenizer:
+    """Stands in for the model's tokenizer: one token per whitespace-separated word"""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        if isinstance(text, list):
+            return {"input_ids": [[0] * len(TOKEN.findall(item)) for item in text]}
+        spans = [match.span() for match in TOKEN.finditer(text)]
+        encoding = {"input_ids": [0] * len(spans)}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = spans
+        return encoding
+
+
+@pytest.fixture
+def tokenizer():
+    return WhitespaceTokenizer()
+
+
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
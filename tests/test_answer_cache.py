@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pgvector")
+
+from conftest import requires_db
+
+pytestmark = requires_db
+
+DIMENSIONS = 384
+
+
+def test_answer_stored_after_a_document_change_never_matches():
+    from sqlalchemy import delete
+    from database import AsyncSessionLocal
+    from models import AnswerCacheEntry
+    from services.answer_cache import AnswerCache
+
+    cache = AnswerCache(min_similarity=0.99)
+    embedding = [1.0] + [0.0] * (DIMENSIONS - 1)
+    params = AnswerCache.retrieval_params(test="version-race")
+    context = [{"document_id": -1, "chunk_text": "old text"}]
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            started = await cache.lookup(db, embedding, params)
+            await db.commit()
+
+            # A re-index commits while the answer is being generated
+            await AnswerCache.invalidate_documents(db, [-1])
+            await db.commit()
+
+            await cache.store(db, "q", embedding, params, started.document_set_version, "stale", context)
+            try:
+                after_race = await cache.lookup(db, embedding, params)
+                await db.commit()
+
+                await cache.store(db, "q", embedding, params, after_race.document_set_version, "fresh", context)
+                fresh = await cache.lookup(db, embedding, params)
+                await db.commit()
+                return started, after_race, fresh
+            finally:
+                await db.execute(delete(AnswerCacheEntry).where(AnswerCacheEntry.retrieval_params == params))
+                await db.commit()
+
+    started, after_race, fresh = asyncio.run(run())
+    assert after_race.document_set_version == started.document_set_version + 1
+    assert not after_race.hit
+    assert fresh.answer == "fresh"
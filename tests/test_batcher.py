@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("sqlalchemy")
+
+from services.batcher import QueryBatcher
+
+
+class RecordingEmbeddings:
+    """Embeds each text as [len(text)] and records the batches it was given"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def generate_batch_embeddings(self, texts):
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def test_full_batch_flushes_without_waiting_for_the_window():
+    embeddings = RecordingEmbeddings()
+    batcher = QueryBatcher(embeddings, window_ms=60_000, max_batch_size=3)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc"])), timeout=1
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert embeddings.batches == [["a", "bb", "ccc"]]
+
+
+def test_window_flushes_a_partial_batch():
+    embeddings = RecordingEmbeddings()
+    batcher = QueryBatcher(embeddings, window_ms=20, max_batch_size=32)
+
+    async def run():
+        first = asyncio.gather(batcher.embed("a"), batcher.embed("bb"))
+        await asyncio.sleep(0)
+        assert embeddings.batches == []
+        return await asyncio.wait_for(first, timeout=1)
+
+    assert asyncio.run(run()) == [[1.0], [2.0]]
+    assert embeddings.batches == [["a", "bb"]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["avg_batch_size"] == 2
+    assert stats["batch_fill_ratio"] == 2 / 32
+
+
+def test_queries_beyond_a_full_batch_start_the_next_one():
+    embeddings = RecordingEmbeddings()
+    batcher = QueryBatcher(embeddings, window_ms=20, max_batch_size=2)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc"])), timeout=1
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert embeddings.batches == [["a", "bb"], ["ccc"]]
+
+
+def test_batch_failure_reaches_every_caller():
+    batcher = QueryBatcher(RecordingEmbeddings(error=RuntimeError("model failed")), window_ms=1, max_batch_size=8)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["model failed", "model failed"]
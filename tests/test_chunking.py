@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+import pytest
+
+from services.chunking import SentenceChunker
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda sigma omega".split()
+
+
+def make_sentences(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        # Similar lengths, so a greedy packer would not fall back into step by chance
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 18))).capitalize() + f" {number}."
+        for number in range(count)
+    ]
+
+
+def chunk_texts(tokenizer, sentences, max_tokens=64):
+    chunker = SentenceChunker(tokenizer, max_tokens)
+    text = " ".join(sentences)
+    chunks = []
+    # Fed in uneven segments, as extraction yields pages
+    for start in range(0, len(text), 997):
+        chunks.extend(chunker.feed(text[start:start + 997]))
+    chunks.extend(chunker.finish())
+    return [chunk.text for chunk in chunks]
+
+
+def test_chunks_stay_within_budget_and_cover_the_text(tokenizer):
+    sentences = make_sentences(500)
+    texts = chunk_texts(tokenizer, sentences)
+
+    assert all(len(text.split()) <= 64 for text in texts)
+    assert " ".join(texts).split() == " ".join(sentences).split()
+
+
+@pytest.mark.parametrize("position", [10, 100, 300, 1000, 1500])
+def test_inserted_sentence_changes_only_nearby_chunks(tokenizer, position):
+    sentences = make_sentences(2000)
+    edited = sentences[:position] + ["An inserted sentence that is about as long as the others around it."] + sentences[position:]
+
+    before = chunk_texts(tokenizer, sentences)
+    after = chunk_texts(tokenizer, edited)
+
+    # Chunks whose text is new would be embedded on re-index; the rest are reused
+    new_chunks = Counter(after) - Counter(before)
+    assert len(before) > 300
+    assert sum(new_chunks.values()) <= 3
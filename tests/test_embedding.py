@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from services.embedding import PooledEmbedding
+
+
+def test_pooled_embedding_is_the_normalized_length_weighted_mean():
+    pooled = PooledEmbedding()
+    pooled.add([[1.0, 0.0], [0.0, 1.0]], [3.0, 1.0])
+
+    x, y = pooled.result()
+    assert x == pytest.approx(3 / math.sqrt(10))
+    assert y == pytest.approx(1 / math.sqrt(10))
+
+
+def test_pooling_over_batches_matches_one_batch():
+    embeddings = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.6, 0.8], [0.8, 0.0, 0.6]]
+    weights = [120.0, 40.0, 300.0, 7.0]
+
+    whole = PooledEmbedding()
+    whole.add(embeddings, weights)
+    batched = PooledEmbedding()
+    batched.add(embeddings[:1], weights[:1])
+    batched.add([], [])
+    batched.add(embeddings[1:], weights[1:])
+
+    assert batched.result() == pytest.approx(whole.result())
+    assert math.fsum(value * value for value in whole.result()) == pytest.approx(1.0)
+
+
+def test_empty_or_cancelling_input_has_no_pooled_embedding():
+    assert PooledEmbedding().result() is None
+
+    cancelled = PooledEmbedding()
+    cancelled.add([[1.0, 0.0], [-1.0, 0.0]], [1.0, 1.0])
+    assert cancelled.result() is None
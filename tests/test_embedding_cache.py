@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pgvector")
+
+from conftest import requires_db
+
+DIMENSIONS = 384
+
+
+def test_query_lookups_stay_in_memory(monkeypatch):
+    from services import embedding_cache
+    from services.embedding_cache import EmbeddingCache
+
+    def no_database():
+        raise AssertionError("the persistent tier was used")
+
+    monkeypatch.setattr(embedding_cache, "AsyncSessionLocal", no_database)
+    cache = EmbeddingCache("test-model", persistent=True)
+
+    async def run():
+        await cache.put_many(["known"], [[0.5] * DIMENSIONS])
+        return await cache.get_many(["known", "unknown"])
+
+    known, unknown = asyncio.run(run())
+    assert known == [0.5] * DIMENSIONS
+    assert unknown is None
+    assert (cache.memory_hits, cache.persistent_hits, cache.misses) == (1, 0, 1)
+
+
+@requires_db
+def test_evict_drops_the_least_recently_used_rows_beyond_max_rows():
+    from sqlalchemy import delete, func, select
+    from database import AsyncSessionLocal
+    from models import EmbeddingCacheEntry
+    from services.embedding_cache import EmbeddingCache
+
+    keys = [f"test-evict-{i}" for i in range(5)]
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            for i, key in enumerate(keys):
+                db.add(EmbeddingCacheEntry(
+                    key=key, model_name="test", embedding=[0.0] * DIMENSIONS,
+                    last_used_at=datetime(2000, 1, 1 + i, tzinfo=timezone.utc)
+                ))
+            await db.commit()
+            try:
+                total = (await db.execute(select(func.count()).select_from(EmbeddingCacheEntry))).scalar()
+                cache = EmbeddingCache("test", max_rows=total - 3, evict_batch=2)
+                deleted = [await cache.evict(db), await cache.evict(db), await cache.evict(db)]
+                await db.commit()
+                left = (await db.execute(
+                    select(EmbeddingCacheEntry.key).where(EmbeddingCacheEntry.key.in_(keys))
+                )).scalars().all()
+                return deleted, sorted(left)
+            finally:
+                await db.execute(delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.key.in_(keys)))
+                await db.commit()
+
+    deleted, left = asyncio.run(run())
+    assert deleted == [2, 1, 0]
+    assert left == keys[3:]
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from services.extraction import ExtractionPool
+
+
+def test_closing_a_stuck_document_leaves_other_documents_running():
+    async def run():
+        extraction_pool = ExtractionPool(max_workers=3)
+        stuck = await extraction_pool.open(2)
+        other = await extraction_pool.open(5)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(stuck.submit(time.sleep, 60), timeout=0.5)
+            started = time.perf_counter()
+            await extraction_pool.close(stuck)
+            closed_after = time.perf_counter() - started
+
+            worker_pid = await asyncio.wait_for(other.submit(os.getpid), timeout=30)
+            # The stuck document's slots are free again
+            third = await asyncio.wait_for(extraction_pool.open(4), timeout=1)
+            await extraction_pool.close(third)
+            return stuck.processes, other.processes, third.processes, closed_after, worker_pid
+        finally:
+            await extraction_pool.close(other)
+            extraction_pool.shutdown()
+
+    stuck_processes, other_processes, third_processes, closed_after, worker_pid = asyncio.run(run())
+    assert (stuck_processes, other_processes, third_processes) == (2, 1, 2)
+    assert closed_after < 10
+    assert worker_pid != os.getpid()
+
+
+def test_finished_processes_stay_warm_and_killed_ones_are_replaced():
+    async def run():
+        extraction_pool = ExtractionPool(max_workers=1)
+        try:
+            pids = []
+            for _ in range(2):
+                pool = await extraction_pool.open(1)
+                pids.append(await asyncio.wait_for(pool.submit(os.getpid), timeout=30))
+                await extraction_pool.close(pool)
+
+            stuck = await extraction_pool.open(1)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(stuck.submit(time.sleep, 60), timeout=0.5)
+            await extraction_pool.close(stuck)
+
+            pool = await asyncio.wait_for(extraction_pool.open(1), timeout=1)
+            pids.append(await asyncio.wait_for(pool.submit(os.getpid), timeout=30))
+            await extraction_pool.close(pool)
+            return pids
+        finally:
+            extraction_pool.shutdown()
+
+    first, reused, replaced = asyncio.run(run())
+    assert reused == first
+    assert replaced != first
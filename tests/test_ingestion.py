@@ -0,0 +1,245 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pgvector")
+
+from conftest import WhitespaceTokenizer, requires_db
+
+pytestmark = requires_db
+
+DIMENSIONS = 384
+
+
+def unit_vector(index: int) -> list:
+    vector = [0.0] * DIMENSIONS
+    vector[index % DIMENSIONS] = 1.0
+    return vector
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Chunk with a whitespace tokenizer and embed without a model"""
+    from services import ingestion
+    from services.chunking import SentenceChunker
+
+    async def generate_batch_embeddings(texts, persistent_cache=False):
+        return [unit_vector(i) for i, _ in enumerate(texts)]
+
+    monkeypatch.setattr(ingestion.embedding_service, "chunker", lambda: SentenceChunker(WhitespaceTokenizer(), 8))
+    monkeypatch.setattr(ingestion.embedding_service, "generate_batch_embeddings", generate_batch_embeddings)
+    monkeypatch.setattr(ingestion, "INGEST_BATCH_SIZE", 2)
+    return ingestion
+
+
+async def _chunk_count(db, document_id: int) -> int:
+    from sqlalchemy import func, select
+    from models import DocumentChunk
+
+    return (await db.execute(
+        select(func.count()).select_from(DocumentChunk).where(DocumentChunk.document_id == document_id)
+    )).scalar()
+
+
+async def _delete_document(db, document_id: int) -> None:
+    from sqlalchemy import delete
+    from models import Document, DocumentChunk
+
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+    await db.execute(delete(Document).where(Document.id == document_id))
+    await db.commit()
+
+
+def test_failed_chunk_batch_keeps_document_without_partial_chunks(tmp_path, monkeypatch, fake_models):
+    from sqlalchemy import text
+    from database import AsyncSessionLocal
+    from models import Document
+
+    ingestion = fake_models
+    real_insert = ingestion.bulk_insert_chunks
+    calls = 0
+
+    async def failing_insert(db, rows):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            # Aborts the transaction the way a failing COPY or INSERT does
+            await db.execute(text("SELECT 1 / 0"))
+        return await real_insert(db, rows)
+
+    monkeypatch.setattr(ingestion, "bulk_insert_chunks", failing_insert)
+
+    file_path = tmp_path / "document.txt"
+    file_path.write_text(" ".join(f"Sentence number {i} has six words." for i in range(20)))
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            document = Document(title="test:failed-batch", file_path=str(file_path), is_active=True)
+            result = await ingestion.ingest_document(db, document, str(file_path), ".txt")
+            await db.commit()
+            try:
+                return result, await _chunk_count(db, document.id), document.content
+            finally:
+                await _delete_document(db, document.id)
+
+    result, stored_chunks, content = asyncio.run(run())
+    assert calls >= 2
+    assert result.num_chunks == 0
+    assert stored_chunks == 0
+    assert content.startswith("Sentence number 0")
+
+
+def test_reindex_after_inserted_sentence_embeds_few_chunks(tmp_path, monkeypatch, fake_models):
+    from database import AsyncSessionLocal
+    from models import Document
+    from services.chunking import SentenceChunker
+    from test_chunking import make_sentences
+
+    ingestion = fake_models
+    monkeypatch.setattr(ingestion.embedding_service, "chunker", lambda: SentenceChunker(WhitespaceTokenizer(), 64))
+
+    sentences = make_sentences(1000)
+    file_path = tmp_path / "document.txt"
+    file_path.write_text(" ".join(sentences))
+    edited_path = tmp_path / "edited.txt"
+    edited_path.write_text(" ".join(
+        sentences[:10] + ["An inserted sentence that is about as long as the others around it."] + sentences[10:]
+    ))
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            document = Document(title="test:reindex-insert", file_path=str(file_path), is_active=True)
+            await ingestion.ingest_document(db, document, str(file_path), ".txt")
+            await db.commit()
+            try:
+                result = await ingestion.reindex_document(db, document, str(edited_path), ".txt")
+                await db.commit()
+                return result
+            finally:
+                await _delete_document(db, document.id)
+
+    result = asyncio.run(run())
+    assert result.num_chunks > 100
+    assert result.chunks_embedded <= 3
+    assert result.chunks_removed <= 3
+
+
+def test_start_requeues_jobs_whose_heartbeat_stopped(monkeypatch):
+    import uuid
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import delete, select
+    from database import AsyncSessionLocal
+    from models import IngestionJob
+    from services.ingestion import IngestionWorkerPool
+
+    stale_id, live_id = str(uuid.uuid4()), str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    processed = []
+
+    async def record(self, job_id):
+        processed.append(job_id)
+
+    monkeypatch.setattr(IngestionWorkerPool, "_process", record)
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            # Both started long ago; only the live one still sends heartbeats
+            for job_id, heartbeat_at in ((stale_id, now - timedelta(seconds=600)), (live_id, now)):
+                db.add(IngestionJob(
+                    id=job_id, status="running", filename="test.txt", file_path="missing.txt",
+                    generate_embeddings=True, started_at=now - timedelta(hours=2),
+                    lease_owner=str(uuid.uuid4()), heartbeat_at=heartbeat_at
+                ))
+            await db.commit()
+
+        pool = IngestionWorkerPool(concurrency=1, lease_timeout=60)
+        try:
+            await pool.start()
+            await pool._queue.join()
+        finally:
+            await pool.stop()
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(IngestionJob.id, IngestionJob.status, IngestionJob.lease_owner)
+                .where(IngestionJob.id.in_([stale_id, live_id]))
+            )).all()
+            await db.execute(delete(IngestionJob).where(IngestionJob.id.in_([stale_id, live_id])))
+            await db.commit()
+        return {job_id: (status, lease_owner is not None) for job_id, status, lease_owner in rows}
+
+    jobs = asyncio.run(run())
+    assert stale_id in processed
+    assert live_id not in processed
+    assert jobs == {stale_id: ("queued", False), live_id: ("running", True)}
+
+
+def _run_job(tmp_path, monkeypatch, ingestion, during_ingest=None):
+    """Process one queued job; returns the job row and the documents titled after it"""
+    import uuid
+    from sqlalchemy import delete, select
+    from database import AsyncSessionLocal
+    from models import Document, IngestionJob
+
+    job_id = str(uuid.uuid4())
+    filename = f"test-{job_id}.txt"
+    file_path = tmp_path / filename
+    file_path.write_text("First sentence here. Second sentence here.")
+    real_ingest = ingestion.ingest_document
+
+    async def ingest(db, document, *args, **kwargs):
+        result = await real_ingest(db, document, *args, **kwargs)
+        if during_ingest is not None:
+            await during_ingest(job_id)
+        return result
+
+    monkeypatch.setattr(ingestion, "ingest_document", ingest)
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            db.add(IngestionJob(id=job_id, status="queued", filename=filename, file_path=str(file_path)))
+            await db.commit()
+
+        await ingestion.IngestionWorkerPool(concurrency=1)._process(job_id)
+
+        async with AsyncSessionLocal() as db:
+            job = (await db.execute(select(IngestionJob).where(IngestionJob.id == job_id))).scalar_one()
+            document_ids = (await db.execute(
+                select(Document.id).where(Document.title == filename)
+            )).scalars().all()
+            await db.execute(delete(IngestionJob).where(IngestionJob.id == job_id))
+            for document_id in document_ids:
+                await _delete_document(db, document_id)
+            await db.commit()
+        return job, document_ids
+
+    return asyncio.run(run())
+
+
+def test_job_completes_in_the_same_transaction_as_its_document(tmp_path, monkeypatch, fake_models):
+    job, document_ids = _run_job(tmp_path, monkeypatch, fake_models)
+
+    assert job.status == "completed"
+    assert len(document_ids) == 1
+    assert job.document_id == document_ids[0]
+
+
+def test_job_reclaimed_during_ingest_does_not_create_a_document(tmp_path, monkeypatch, fake_models):
+    from sqlalchemy import update
+    from database import AsyncSessionLocal
+    from models import IngestionJob
+
+    async def taken_over(job_id):
+        # Another process re-queued and claimed the job while this one was stalled
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IngestionJob).where(IngestionJob.id == job_id).values(lease_owner="another-worker")
+            )
+            await db.commit()
+
+    job, document_ids = _run_job(tmp_path, monkeypatch, fake_models, during_ingest=taken_over)
+
+    assert job.status == "running"
+    assert job.lease_owner == "another-worker"
+    assert document_ids == []
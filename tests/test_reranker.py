@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from services.reranker import Reranker
+
+
+def make_results(*texts):
+    return [{"chunk_text": text, "similarity_score": 1.0 - i / 10} for i, text in enumerate(texts)]
+
+
+class StubReranker(Reranker):
+    """Scores a text by its length instead of running a cross-encoder"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def score(self, query, texts):
+        self.calls.append(list(texts))
+        self.release.wait(timeout=30)
+        if self.error is not None:
+            raise self.error
+        return [float(len(text)) for text in texts]
+
+
+def test_rerank_orders_scored_candidates_and_keeps_the_rest_after_them():
+    reranker = StubReranker(max_pairs=3)
+    results = make_results("aa", "a", "aaaa", "aaaaaaaa")
+
+    try:
+        kept, reranked = asyncio.run(reranker.rerank("q", results, top_k=4))
+    finally:
+        reranker.shutdown()
+
+    assert reranked is True
+    # Only the first max_pairs are scored; the last result keeps its place
+    assert [result["chunk_text"] for result in kept] == ["aaaa", "aa", "a", "aaaaaaaa"]
+    assert [result.get("rerank_score") for result in kept] == [4.0, 2.0, 1.0, None]
+    assert reranker.calls == [["aa", "a", "aaaa"]]
+    assert reranker.stats()["reranked"] == 1
+
+
+def test_timed_out_call_keeps_retrieval_order_and_later_calls_skip_instead_of_queueing():
+    reranker = StubReranker(timeout_ms=50, max_workers=1)
+    reranker.release.clear()
+    results = make_results("a", "aaa", "aa")
+
+    async def run():
+        timed_out = await reranker.rerank("q", results, top_k=2)
+        stats_while_busy = reranker.stats()
+
+        started = time.perf_counter()
+        skipped = await reranker.rerank("q", results, top_k=2)
+        skipped_after = time.perf_counter() - started
+
+        reranker.release.set()
+        for _ in range(200):
+            if reranker.stats()["abandoned_jobs"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        recovered = await reranker.rerank("q", results, top_k=2)
+        return timed_out, stats_while_busy, skipped, skipped_after, recovered
+
+    try:
+        timed_out, stats_while_busy, skipped, skipped_after, recovered = asyncio.run(run())
+    finally:
+        reranker.release.set()
+        reranker.shutdown()
+
+    assert timed_out == (results[:2], False)
+    assert stats_while_busy["timeouts"] == 1
+    assert stats_while_busy["abandoned_jobs"] == 1
+
+    # Returned at once, without submitting work behind the stuck call
+    assert skipped == (results[:2], False)
+    assert skipped_after < 0.05
+    assert len(reranker.calls) == 2
+
+    kept, reranked = recovered
+    assert reranked is True
+    assert [result["chunk_text"] for result in kept] == ["aaa", "aa"]
+    stats = reranker.stats()
+    assert (stats["skipped_busy"], stats["abandoned_jobs"], stats["reranked"]) == (1, 0, 1)
+
+
+def test_scoring_error_keeps_retrieval_order():
+    reranker = StubReranker()
+    reranker.error = RuntimeError("model failed")
+    results = make_results("a", "aaa")
+
+    try:
+        assert asyncio.run(reranker.rerank("q", results, top_k=1)) == (results[:1], False)
+    finally:
+        reranker.shutdown()
+    assert reranker.stats()["errors"] == 1